@@ -1,47 +1,51 @@
 """A set of tools for working with AWS accounts.
 
-The methods list_available_services() and list_api_versions() leverage
-os.listdir() which is very slow when called from within
-concurrent.futures.ThreadPoolExecutor instances.  Sadly, these are called when
-a boto3.Session.create_client() is called.  This process becomes prohibitive
-when the use-case creates new boto3 session objects in threads (like we do).
-
-We'll monkey patch these two services to leverage a global call cache (vs the
-default instance call cache), which insures a caches across instances.
+Components are imported lazily on first attribute access so that
+``import cs.aws_account`` does not pay the boto3/botocore import cost
+until a component is actually used.
 """
-
-# pylint: disable=wrong-import-position
-
-import botocore.loaders
-
-from .monkies import global_cache
-
-
-botocore.loaders.Loader.list_available_services = global_cache(
-    botocore.loaders.Loader.list_available_services)
-botocore.loaders.Loader.list_api_versions = global_cache(
-    botocore.loaders.Loader.list_api_versions)
-
-
-from .interfaces import IAccount
-from .interfaces import IRegionalAccount
-from .interfaces import IRegionalAccountSet
-from .interfaces import IRegionalAccounts
-from .interfaces import ISession
-from .session import Session
-from .session import session_factory  # caching
-from .account import Account
-from .account import account_factory  # caching
-from .regional_account import RegionalAccount
-from .regional_account import regional_account_factory  # caching
-from .regional_accounts import RegionalAccounts
-from .regional_accounts import regional_accounts_factory  # caching
-from .regional_account_set import RegionalAccountSet
-from .regional_account_set import regional_account_set_factory  # non-caching (but contained objects are cached)
-
-
+import importlib
+
+
+_LAZY_IMPORTS = {
+    'IAccount': '.interfaces',
+    'IRegionalAccount': '.interfaces',
+    'IRegionalAccountSet': '.interfaces',
+    'IRegionalAccounts': '.interfaces',
+    'ISession': '.interfaces',
+    'Session': '.session',
+    'session_factory': '.session',  # caching
+    'Account': '.account',
+    'account_factory': '.account',  # caching
+    'RegionalAccount': '.regional_account',
+    'regional_account_factory': '.regional_account',  # caching
+    'RegionalAccounts': '.regional_accounts',
+    'regional_accounts_factory': '.regional_accounts',  # caching
+    'RegionalAccountSet': '.regional_account_set',
+    'regional_account_set_factory': '.regional_account_set',  # non-caching (but contained objects are cached)
+}
+
+
+# the names are provided by the module __getattr__() (PEP 562), which pylint can't see
+# pylint: disable=undefined-all-variable
 __all__ = [
     'IAccount', 'IRegionalAccount', 'IRegionalAccountSet', 'IRegionalAccounts', 'ISession',
     'Session', 'session_factory', 'Account', 'account_factory', 'RegionalAccount', 'regional_account_factory',
     'RegionalAccounts', 'regional_accounts_factory', 'RegionalAccountSet', 'regional_account_set_factory',
 ]
+# pylint: enable=undefined-all-variable
+
+
+def __getattr__(name):
+    """Import the requested component on first access."""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the lazily importable components along with the module globals."""
+    return sorted(set(globals()) | set(__all__))
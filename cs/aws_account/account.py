@@ -1,14 +1,16 @@
 """Components for interacting with AWS accounts."""
 # pylint: disable=invalid-name
-from threading import RLock
-import operator
+from threading import Lock
+import math
+import time
 
-from cachetools import cached, cachedmethod, Cache
 from zope import interface
 from zope.component.factory import Factory
 from botocore.config import Config
 
-from .caching_key import aggregated_string_hash
+from .caching import cached_keyed_lock
+from .caching_key import freeze
+from .clients import get_client
 from .interfaces import IAccount
 from .session import session_factory
 from .retry import aws_throttling_retry
@@ -20,15 +22,25 @@ class Account:
 
     Args:
         session: cs.aws_account.Session instance
+
+    Kwargs:
+        cache_ttl: optional number of seconds to cache the account aliases
+                   for.  If not given, the aliases are cached for the life of
+                   the object.
+        no_alias_cache_ttl: optional number of seconds to cache an empty
+                   alias list for (accounts without an alias are common and
+                   rarely gain one).  Defaults to cache_ttl.
     """
 
     aws_client_config = Config(retries={"max_attempts": 10})
 
-    def __init__(self, session):
+    def __init__(self, session, cache_ttl=None, no_alias_cache_ttl=None):
         """Initialize the Account with a Read Lock."""
         self._session = session
-        self._cache_aliases = Cache(maxsize=1)
-        self._rlock = RLock()
+        self._cache_ttl = cache_ttl
+        self._no_alias_cache_ttl = cache_ttl if no_alias_cache_ttl is None else no_alias_cache_ttl
+        self._aliases_cache = (None, 0.0)  # (aliases, monotonic expiry time)
+        self._aliases_lock = Lock()  # held while listing aliases
 
     def account_id(self):
         """Return account identifier string."""
@@ -39,13 +51,31 @@ class Account:
         aliases = self.aliases()
         return aliases[0] if aliases else self.account_id()
 
-    @cachedmethod(operator.attrgetter('_cache_aliases'), lock=operator.attrgetter('_rlock'))
-    @aws_throttling_retry()
     def aliases(self):
         """Return list of all account aliases."""
-        client_kwargs = self.session().client_kwargs(service='iam')
-        client_kwargs['config'] = Account.aws_client_config
-        return self.session().boto3().client('iam', **client_kwargs).list_account_aliases()['AccountAliases']
+        aliases, expiry = self._aliases_cache
+        if time.monotonic() < expiry:
+            return aliases
+        with self._aliases_lock:
+            aliases, expiry = self._aliases_cache
+            now = time.monotonic()
+            if now < expiry:
+                return aliases
+            aliases = self._list_account_aliases()
+            ttl = self._cache_ttl if aliases else self._no_alias_cache_ttl
+            self._aliases_cache = (aliases, math.inf if ttl is None else now + ttl)
+            return aliases
+
+    @aws_throttling_retry()
+    def _list_account_aliases(self):
+        return self._client('iam').list_account_aliases()['AccountAliases']
+
+    def _client(self, service):
+        """Return a boto3 client for service, reused per threadlocal boto3 session."""
+        session = self._session
+        return get_client(session.boto3(), service, **{
+            **session.client_kwargs(service),
+            'config': Account.aws_client_config})
 
     def session(self):
         """Return referenced cs.aws_account.Session object."""
@@ -55,9 +85,15 @@ class Account:
 AccountFactory = Factory(Account)
 
 
+def _account_factory_key(SessionParameters=None, AssumeRole=None, AssumeRoles=None,
+                         cache_ttl=None, no_alias_cache_ttl=None):
+    """Return the account_factory() cache key for the call arguments."""
+    return (freeze(SessionParameters), freeze(AssumeRole), freeze(AssumeRoles), cache_ttl, no_alias_cache_ttl)
+
+
 @interface.implementer(IAccount)
-@cached(cache={}, key=aggregated_string_hash, lock=RLock())
-def account_factory(SessionParameters=None, AssumeRole=None, AssumeRoles=None):
+@cached_keyed_lock(cache={}, key=_account_factory_key)
+def account_factory(SessionParameters=None, AssumeRole=None, AssumeRoles=None, cache_ttl=None, no_alias_cache_ttl=None):
     """Create and cache a cs.aws_account.account.Account.
 
     Common call signatures will return cached object.
@@ -70,6 +106,8 @@ def account_factory(SessionParameters=None, AssumeRole=None, AssumeRoles=None):
         SessionParameters: [see cs.aws_account.session.Session]
         AssumeRole: [see cs.aws_account.session.Session.assume_role]
         AssumeRoles: iterable of assume_role mappings
+        cache_ttl: [see cs.aws_account.account.Account]
+        no_alias_cache_ttl: [see cs.aws_account.account.Account]
 
     Returns:
         cs.aws_account.account.Account object
@@ -77,7 +115,12 @@ def account_factory(SessionParameters=None, AssumeRole=None, AssumeRoles=None):
     session = session_factory(SessionParameters=SessionParameters,
                               AssumeRole=AssumeRole,
                               AssumeRoles=AssumeRoles)
-    return Account(session=session)
+    account_kwargs = {}
+    if cache_ttl is not None:
+        account_kwargs['cache_ttl'] = cache_ttl
+    if no_alias_cache_ttl is not None:
+        account_kwargs['no_alias_cache_ttl'] = no_alias_cache_ttl
+    return Account(session=session, **account_kwargs)
 
 
 CachingAccountFactory = Factory(account_factory)
@@ -8,4 +8,6 @@ class IBoto3Session(interface.Interface):
     """Marker for a Boto3 session object."""
 
 
-interface.classImplements(Session, IBoto3Session)
+# guard against re-registration on reload
+if not IBoto3Session.implementedBy(Session):  # pylint: disable=no-value-for-parameter
+    interface.classImplements(Session, IBoto3Session)
@@ -0,0 +1,75 @@
+"""Caching decorators for the component factories."""
+from threading import Lock
+import functools
+
+from .caching_key import frozen_key
+
+
+_MISSING = object()
+
+
+def cached_keyed_lock(cache, key=frozen_key):
+    """Memoize a function with per-key locking.
+
+    cachetools.cached only synchronizes access to the cache, not the call
+    to the wrapped function.  Concurrent callers with a common cold key
+    would each execute the (expensive) wrapped function.  This decorator
+    assigns a lock to each key so that only one caller builds a given
+    entry while the others wait for, and then share, the result.
+
+    Cache hits on a plain dict are served without taking any lock; other
+    caches (i.e. a bounded cachetools.LRUCache, which reorders itself on
+    reads) are read under the master lock.  The cache is only written to
+    under the per-key and master locks.
+
+    Args:
+        cache: mutable mapping used to store the results (must provide get())
+        key: callable returning the cache key for the call arguments
+    """
+    def decorator(func):
+        locks = {}
+        master_lock = Lock()
+
+        if type(cache) is dict:  # pylint: disable=unidiomatic-typecheck
+            # dict reads are atomic, so cache hits don't need a lock
+            cache_get = cache.get
+        else:
+            def cache_get(k, default):
+                with master_lock:
+                    return cache.get(k, default)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            value = cache_get(k, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            with master_lock:
+                key_lock = locks.setdefault(k, Lock())
+            with key_lock:
+                try:
+                    value = cache_get(k, _MISSING)
+                    if value is not _MISSING:
+                        return value
+                    value = func(*args, **kwargs)
+                    with master_lock:
+                        cache[k] = value
+                finally:
+                    # also when func() raised, or failing keys would leak their lock
+                    with master_lock:
+                        if locks.get(k) is key_lock:
+                            del locks[k]
+            return value
+
+        def cache_clear():
+            with master_lock:
+                cache.clear()
+
+        wrapper.cache = cache
+        wrapper.cache_key = key
+        wrapper.cache_lock = master_lock
+        wrapper.cache_locks = locks  # per-key locks of the calls in progress
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
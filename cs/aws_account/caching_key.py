@@ -1,14 +1,35 @@
 """Helpers for creating a caching key."""
+from collections.abc import Mapping, Set
 
 
-def aggregated_string_hash(*args, **kwargs):
-    """Return a hash based on aggregated object strings."""
-    _id = ""
-    for arg in args:
-        _id += str(arg)
+# the leaf types of factory configurations, checked first to skip the (slower) ABC checks
+_SCALARS = (str, int, float, type(None))
 
-    if kwargs:
-        keys = sorted(kwargs.keys())
-        for k in keys:
-            _id += f"{k}:{kwargs[k]}"
-    return hash(_id)
+
+def freeze(obj):
+    """Return a hashable representation of obj.
+
+    Mappings become sorted tuples of (key, value) pairs, sets become
+    frozensets and other iterable containers (lists, tuples) become tuples.
+    Containers are frozen recursively, all other objects are returned as-is.
+    """
+    if isinstance(obj, _SCALARS):
+        return obj
+    if isinstance(obj, (dict, Mapping)):  # dict first: checked before the (slower) ABC
+        return tuple(sorted((k, freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    if isinstance(obj, Set):
+        return frozenset(freeze(v) for v in obj)
+    return obj
+
+
+def frozen_key(*args, **kwargs):
+    """Return a hashable key built from the frozen call arguments.
+
+    The key is the frozen arguments themselves rather than their hash, so
+    keys only match if the frozen arguments compare equal.  Equal values of
+    different types still match (i.e. 1, 1.0 and True), as do a mapping and
+    the sequence of its sorted (key, value) pairs.
+    """
+    return (freeze(args), freeze(kwargs))
@@ -0,0 +1,37 @@
+"""Process-wide pool of boto3 clients."""
+from threading import Lock
+import weakref
+
+from .caching_key import freeze
+
+
+_clients = weakref.WeakKeyDictionary()  # boto3 session -> {(service, frozen kwargs): client}
+_lock = Lock()
+
+
+def get_client(boto3_session, service_name, **kwargs):
+    """Return a boto3 client for service_name, reused for the life of boto3_session.
+
+    Building a boto3 client is expensive (service model loading, endpoint
+    resolution, event handler registration) while the clients themselves
+    are thread-safe.  Clients are pooled per boto3 session and call
+    arguments, which are frozen into the key (objects such as a
+    botocore.config.Config are keyed by identity).  A pool entry is
+    dropped along with its boto3 session.
+
+    Args:
+        boto3_session: boto3.session.Session the client is created from
+        service_name: AWS service name (i.e. 'ec2')
+        kwargs: boto3.session.Session.client() kwargs
+    """
+    key = (service_name, freeze(kwargs))
+    with _lock:
+        clients = _clients.get(boto3_session)
+        if clients is None:
+            clients = _clients[boto3_session] = {}
+        client = clients.get(key)
+    if client is None:
+        client = boto3_session.client(service_name, **kwargs)  # built outside the lock
+        with _lock:
+            client = clients.setdefault(key, client)
+    return client
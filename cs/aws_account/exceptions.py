@@ -1,6 +1,27 @@
 """Provides custom exceptions for cs.aws_account."""
 
 
+# (error substrings, warning) pairs, checked in order; first match wins.
+_WARNINGS = (
+    (("NoSuch",),
+     "Queried item does not exist. Check in the AWS Web Console."),
+    (("AccessDenied",),
+     "Improper AWS IAM permissions. Verify application role has permission to access resource."),
+    (("AuthFailure", "InvalidClientTokenId", "UnrecognizedClientException"),
+     "Attempted to access a non-existent resource. "
+     "Ensure the action, account, and region are removed from the RAS filter"),
+)
+
+
+def _warning(error_string):
+    """Return the warning for the given error string."""
+    for needles, warning in _WARNINGS:
+        for needle in needles:
+            if needle in error_string:
+                return warning
+    return "None"
+
+
 class AWSClientException(Exception):
     """Represents a boto3 error raised from making a call to AWS API."""
 
@@ -10,22 +31,13 @@ class AWSClientException(Exception):
         self._account = kwargs['AccountAlias']
         self._account_id = kwargs['AccountId']
         self._region = kwargs['Region']
-        self._warning = "None"
-        error_string = str(self._error)
-        if "NoSuch" in error_string:
-            self._warning = "Queried item does not exist. Check in the AWS Web Console."
-        elif "AccessDenied" in error_string:
-            self._warning = "Improper AWS IAM permissions. Verify application role has permission to access resource."
-        elif ("AuthFailure" in error_string or
-              "InvalidClientTokenId" in error_string or
-              "UnrecognizedClientException" in error_string):
-            self._warning = ("Attempted to access a non-existent resource. "
-                             "Ensure the action, account, and region are removed from the RAS filter")
-        self._error_message = (f"Error message: {error_string}. Account Alias: {str(self._account)}. "
-                               f"Account ID: {str(self._account_id)}. "
-                               f"Region: {str(self._region)}. Warning: {str(self._warning)}")
+        error_string = str(error)
+        self._warning = _warning(error_string)
+        self._error_message = (f"Error message: {error_string}. Account Alias: {self._account}. "
+                               f"Account ID: {self._account_id}. "
+                               f"Region: {self._region}. Warning: {self._warning}")
         super().__init__(self._error_message)
 
     def __str__(self):
         """Emit the prepared error message."""
-        return str(self._error_message)
+        return self._error_message
@@ -112,6 +112,12 @@ class IRegionalAccount(interface.Interface):
             [dependent on named boto3 service method]
         """
 
+    def acall_client(service, method, client_kwargs=None, **kwargs):
+        """Return awaitable for call_client() that does not block the event loop.
+
+        Same call features as call_client().
+        """
+
     def get_paginator(service, method, client_kwargs=None, **kwargs):
         """Return paginator for boto3 service client method limited by properties in ratelimit.
 
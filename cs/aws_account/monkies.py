@@ -1,34 +1,88 @@
-"""Monkey patching for various botocore features."""
-from threading import RLock
+"""Monkey patching for various botocore features.
+
+The methods list_available_services() and list_api_versions() leverage
+os.listdir() which is very slow when called from within
+concurrent.futures.ThreadPoolExecutor instances.  Sadly, these are called when
+a boto3.Session.create_client() is called.  This process becomes prohibitive
+when the use-case creates new boto3 session objects in threads (like we do).
+
+We'll monkey patch these two services to leverage a global call cache (vs the
+default instance call cache), which insures a caches across instances.  The
+original methods are wrapped rather than re-implemented, so the listing logic
+stays botocore's own.
+"""
+from threading import Lock
 
 from botocore.loaders import Loader
-# pylint: disable=global-variable-not-assigned, invalid-name
+# pylint: disable=global-statement, invalid-name
 
 
-_cache = {}
-_lock = RLock()
+_SHARD_COUNT = 16  # must be a power of 2
+_MISSING = object()
+_shards = tuple(({}, Lock()) for _ in range(_SHARD_COUNT))
+_lock = Lock()
+_patched = False
 
 
 def global_cache(func):
     """Cache the result of a method globally.
 
     This is essentially a copy of botocore.loaders.Loader.instance_cache but
-    with a synchronized global cache (vs instance-specific)
+    with a synchronized global cache (vs instance-specific).  The cache is
+    split into shards by key hash; hits are served without locking and a
+    miss only locks the shard of its key.
     """
+    name = func.__name__
+
     def _wrapper(self, *args, **kwargs):
-        global _cache, _lock
-        with _lock:
-            key = (func.__name__,) + args
-            for pair in sorted(kwargs.items()):
-                key += pair
-            if key in _cache:
-                return _cache[key]
-            data = func(self, *args, **kwargs)
-            _cache[key] = data
+        key = (name, args, frozenset(kwargs.items()))
+        cache, lock = _shards[hash(key) & (_SHARD_COUNT - 1)]
+        data = cache.get(key, _MISSING)
+        if data is not _MISSING:
+            return data
+        with lock:
+            data = cache.get(key, _MISSING)
+            if data is _MISSING:
+                data = func(self, *args, **kwargs)
+                cache[key] = data
             return data
     return _wrapper
 
 
+class _SearchPaths(list):
+    """Loader search paths which ignore the appending of a present path."""
+
+    def append(self, path):  # pylint: disable=missing-function-docstring
+        if path not in self:
+            super().append(path)
+
+
+def share_loader(loader):
+    """Prepare a botocore Loader to be shared among botocore sessions; return it.
+
+    Every boto3.session.Session appends its data path to the search paths
+    of its loader, which would grow a shared loader's search paths (and the
+    cost of locating data files) with each session built on it.
+    """
+    if not isinstance(loader.search_paths, _SearchPaths):
+        loader._search_paths = _SearchPaths(loader.search_paths)  # pylint: disable=protected-access
+    return loader
+
+
+def patch_botocore_loader():
+    """Patch the botocore Loader listing methods to use the global cache.
+
+    Safe to call multiple times; the patch is only applied once.
+    """
+    global _patched
+    with _lock:
+        if _patched:
+            return
+        Loader.list_available_services = global_cache(Loader.list_available_services)
+        Loader.list_api_versions = global_cache(Loader.list_api_versions)
+        _patched = True
+
+
 Loader_init_orig = Loader.__init__
 
 
@@ -1,28 +1,45 @@
 """Components for interacting with individual AWS Accounts by region."""
-from threading import RLock
+# pylint: disable=invalid-name
+from concurrent.futures import Future
+from threading import Lock
+import asyncio
+import functools
 import logging
 import operator
-import types
+import weakref
 
-from cachetools import cached
+from cachetools import TTLCache
 from zope import interface
 from zope.component.factory import Factory
-from zope.schema.fieldproperty import FieldProperty
 
 from cs.ratelimit import ratelimitedmethod, ratelimitproperties_factory
 
 from .retry import aws_throttling_retry
 from .account import account_factory, Account as AwsAccount
-from .caching_key import aggregated_string_hash
+from .caching import cached_keyed_lock
+from .caching_key import freeze
+from .clients import get_client
 from .exceptions import AWSClientException
 from .interfaces import IRegionalAccount
 
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+def _call_key(client_kwargs, kwargs):
+    """Return a hashable key for the call arguments, or None if they can't be hashed."""
+    key = (freeze(client_kwargs), freeze(kwargs))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
 
 @interface.implementer(IRegionalAccount)
-class RegionalAccount:
+class RegionalAccount:  # pylint: disable=too-many-instance-attributes
     """A   3 session client caller with rate limiting capabilities.
 
     Args:
@@ -31,15 +48,39 @@ class RegionalAccount:
                    and the paginator returned by get_paginator()
         account: cs.aws_account.Account leveraged for all boto3 calls
         region_name: Valid string region_name for all boto3 calls
+        response_cache_ttl: optional mapping of 'service:method' strings (i.e.
+                   'iam:list_users') to the number of seconds call_client()
+                   responses of that method are cached for (up to
+                   response_cache_maxsize distinct calls per method)
+        coalesce_prefixes: optional method name prefixes (i.e. ('describe_',
+                   'list_')) of read-only methods whose concurrent
+                   call_client() calls with identical arguments share a
+                   single AWS call, and its (mutable) response
     """
 
-    ratelimit = FieldProperty(IRegionalAccount['ratelimit'])  # cs.ratelimit.RateLimitProperties instance
+    # Maximum number of responses cached per 'service:method'.
+    response_cache_maxsize = 256
 
-    def __init__(self, ratelimit, account, region_name=None):
+    __slots__ = ('ratelimit', '_account', '_region_name', '_paginators', '_inflight',
+                 '_responses', '_coalesce_prefixes', '_lock', '__weakref__',
+                 '__provides__')  # for zope.interface.alsoProvides()
+
+    def __init__(self, ratelimit, account, region_name=None,  # pylint: disable=too-many-arguments
+                 response_cache_ttl=None, coalesce_prefixes=()):
         """Initialize the RegionalAccount instance."""
-        self.ratelimit = ratelimit
+        # validated once here rather than via a FieldProperty, which would add
+        # a descriptor lookup to every rate limited call
+        IRegionalAccount['ratelimit'].validate(ratelimit)
+        self.ratelimit = ratelimit  # cs.ratelimit.RateLimitProperties instance
         self._account = account
         self._region_name = region_name
+        self._paginators = weakref.WeakKeyDictionary()  # boto3 client -> {method: RateLimitedPaginator}
+        self._inflight = {}  # coalesced call key -> concurrent.futures.Future
+        # 'service:method' -> {call key: response}, guarded by self._lock
+        self._responses = {name: TTLCache(maxsize=self.response_cache_maxsize, ttl=ttl)
+                           for name, ttl in (response_cache_ttl or {}).items() if ttl}
+        self._coalesce_prefixes = tuple(coalesce_prefixes) if coalesce_prefixes else ()
+        self._lock = Lock()
 
     def region(self):
         """Return referenced boto3 region_name string."""
@@ -50,28 +91,40 @@ class RegionalAccount:
         return self._account
 
     def _get_client(self, service, **kwargs):
-        kwargs['service_name'] = service
-        kwargs['region_name'] = self.region()
-        kwargs.update(self.account().session().client_kwargs(service=service))
-        kwargs['config'] = AwsAccount.aws_client_config
-        return self.account().session().boto3().client(**kwargs)
+        """Return a boto3 client for service, reused per threadlocal boto3 session and kwargs."""
+        session = self.account().session()
+        return get_client(session.boto3(), service, **{
+            **kwargs,
+            'region_name': self.region(),
+            **session.client_kwargs(service),
+            'config': AwsAccount.aws_client_config})
 
-    @ratelimitedmethod(operator.attrgetter('ratelimit'))
-    @aws_throttling_retry()
     def _limited(self, callback, **kwargs):
+        """Call callback, going through the rate limiter only when a limit is configured."""
+        limits = self.ratelimit.mapping()
+        if limits['max_count'] and limits['interval']:
+            return self._ratelimited(callback, **kwargs)
+        return self._call(callback, **kwargs)
+
+    @aws_throttling_retry()
+    def _call(self, callback, **kwargs):
         try:
-            logger.debug("calling AWS method %s for account %s (%s) region %s with user arn %s",
-                         callback,
-                         self._account.account_id(),
-                         self._account.alias(),
-                         self._region_name,
-                         self._account.session().arn())
+            # the log arguments are method calls (possibly AWS API calls), only make them when needed
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("calling AWS method %s for account %s (%s) region %s with user arn %s",
+                             callback,
+                             self._account.account_id(),
+                             self._account.alias(),
+                             self._region_name,
+                             self._account.session().arn())
             return callback(**kwargs)
         except Exception as exc:
             raise AWSClientException(
                 exc, AccountAlias=self._account.alias(), Region=self._region_name,
                 AccountId=self._account.account_id()) from exc
 
+    _ratelimited = ratelimitedmethod(operator.attrgetter('ratelimit'))(_call)
+
     @aws_throttling_retry()
     def call_client(self, service, method, client_kwargs=None, **kwargs):
         """Return call to boto3 service client method limited by properties in ratelimit.
@@ -94,9 +147,67 @@ class RegionalAccount:
             [dependent on named boto3 service method]
         """
         client_kwargs = {} if not client_kwargs else client_kwargs
+        if self._responses:
+            responses = self._responses.get(f"{service}:{method}")
+            if responses is not None:
+                return self._cached_call(responses, service, method, client_kwargs, kwargs)
+        return self._dispatch_call(service, method, client_kwargs, kwargs)
+
+    def _dispatch_call(self, service, method, client_kwargs, kwargs):
+        if self._coalesce_prefixes and method.startswith(self._coalesce_prefixes):
+            key = _call_key(client_kwargs, kwargs)
+            if key is not None:  # unhashable arguments aren't coalesced
+                return self._coalesced_call((service, method) + key, service, method, client_kwargs, kwargs)
         client = self._get_client(service, **client_kwargs)
         return self._limited(getattr(client, method), **kwargs)  # can raise AWSClientException
 
+    def _cached_call(self, responses, service, method, client_kwargs, kwargs):
+        """Return the cached response for the call, making the call if expired or absent."""
+        key = _call_key(client_kwargs, kwargs)
+        if key is None:  # unhashable arguments aren't cached
+            return self._dispatch_call(service, method, client_kwargs, kwargs)
+        with self._lock:
+            response = responses.get(key, _MISSING)
+        if response is not _MISSING:
+            return response
+        response = self._dispatch_call(service, method, client_kwargs, kwargs)
+        with self._lock:
+            responses[key] = response
+        return response
+
+    def _coalesced_call(self, key, service, method, client_kwargs, kwargs):
+        """Make the call, or wait for the result of an identical call already in flight."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            client = self._get_client(service, **client_kwargs)
+            result = self._limited(getattr(client, method), **kwargs)  # can raise AWSClientException
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    async def acall_client(self, service, method, client_kwargs=None, **kwargs):
+        """Awaitable call_client().
+
+        The blocking boto3 call runs in the running event loop's default
+        executor, so a single event loop can fan out calls across many
+        accounts and regions.  Same call features as call_client().
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.call_client, service, method, client_kwargs=client_kwargs, **kwargs))
+
     def get_paginator(self, service, method, client_kwargs=None):
         """Return paginator for boto3 service client method limited by properties in ratelimit.
 
@@ -104,32 +215,60 @@ class RegionalAccount:
         a returned paginator
         """
         client_kwargs = {} if not client_kwargs else client_kwargs
-        _limited = self._limited
+        client = self._get_client(service, **client_kwargs)
+        with self._lock:
+            paginators = self._paginators.setdefault(client, {})
+            paginator = paginators.get(method)
+        if paginator is None:
+            paginator = RateLimitedPaginator(client.get_paginator(method), self._limited)
+            with self._lock:
+                paginator = paginators.setdefault(method, paginator)
+        return paginator
 
-        def paginate(self, **kwargs):
-            page_iterator = self.__wrapped__(**kwargs)  # get the default paginator from boto3
-            _orig_method = page_iterator._method  # pylint: disable=protected-access
 
-            def _method(_, **kwargs):
-                return _limited(_orig_method, **kwargs)
+class RateLimitedPaginator:
+    """Wrap a boto3 paginator so that its page requests are rate limited.
 
-            # over-ride with rate-limited method.
-            page_iterator._method = types.MethodType(_method, page_iterator)  # pylint: disable=protected-access
-            return page_iterator
+    Attributes other than paginate() are forwarded to the wrapped paginator.
 
-        client = self._get_client(service, **client_kwargs)
-        paginator = client.get_paginator(method)
-        paginator.__wrapped__ = paginator.paginate  # we're gonna replace this
-        paginator.paginate = types.MethodType(paginate, paginator)
-        return paginator
+    Args:
+        paginator: boto3 paginator (botocore.paginate.Paginator)
+        limited: callable(method, **kwargs) applying the rate limit to method
+    """
+
+    __slots__ = ('_paginator', '_limited')
+
+    def __init__(self, paginator, limited):
+        """Initialize the RateLimitedPaginator."""
+        self._paginator = paginator
+        self._limited = limited
+
+    def paginate(self, **kwargs):
+        """Return the wrapped paginator's page iterator with rate limited page requests."""
+        page_iterator = self._paginator.paginate(**kwargs)
+        # over-ride with rate-limited method.
+        page_iterator._method = functools.partial(  # pylint: disable=protected-access
+            self._limited, page_iterator._method)  # pylint: disable=protected-access
+        return page_iterator
+
+    def __getattr__(self, name):
+        """Forward everything else to the wrapped paginator."""
+        return getattr(self._paginator, name)
 
 
 RegionalAccountFactory = Factory(RegionalAccount)
 
 
+def _regional_account_factory_key(RateLimit=None, Account=None, region_name=None,
+                                  ResponseCacheTTL=None, CoalescePrefixes=None):
+    """Return the regional_account_factory() cache key for the call arguments."""
+    return (freeze(RateLimit), freeze(Account), region_name, freeze(ResponseCacheTTL), freeze(CoalescePrefixes))
+
+
 @interface.implementer(IRegionalAccount)
-@cached(cache={}, key=aggregated_string_hash, lock=RLock())
-def regional_account_factory(RateLimit=None, Account=None, region_name=None):  # pylint: disable=invalid-name
+@cached_keyed_lock(cache={}, key=_regional_account_factory_key)
+def regional_account_factory(RateLimit=None, Account=None, region_name=None,
+                             ResponseCacheTTL=None, CoalescePrefixes=None):
     """Create a cached cs.aws_account.regional_account.RegionalAccount.
 
     Common call signatures will return cached object.
@@ -141,6 +280,10 @@ def regional_account_factory(RateLimit=None, Account=None, region_name=None):  #
         RateLimit: [see cs.ratelimit.components.ratelimitproperties_factory]
         Account: [see cs.aws_account.account.account_factory]
         region_name: valid AWS region name string (i.e. us-east-1, us-east-2, etc)
+        ResponseCacheTTL: optional mapping of 'service:method' strings to
+            response cache seconds (see RegionalAccount)
+        CoalescePrefixes: optional list of method name prefixes whose
+            concurrent identical calls are coalesced (see RegionalAccount)
 
     Returns:
         cs.aws_account.regional_account.RegionalAccount object
@@ -148,7 +291,8 @@ def regional_account_factory(RateLimit=None, Account=None, region_name=None):  #
     RateLimit = RateLimit if RateLimit else {}
     rl_properties = ratelimitproperties_factory(**RateLimit)
     acct = account_factory(**Account)
-    return RegionalAccount(rl_properties, acct, region_name=region_name)
+    return RegionalAccount(rl_properties, acct, region_name=region_name, response_cache_ttl=ResponseCacheTTL,
+                           coalesce_prefixes=CoalescePrefixes)
 
 
 CachingRegionalAccountFactory = Factory(regional_account_factory)
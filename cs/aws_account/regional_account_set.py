@@ -1,5 +1,5 @@
 """Components for interacting with RegionalAccountSets, which are containers for RegionalAccounts instances."""
-from threading import RLock
+from threading import Lock
 
 from zope import interface
 from zope.component.factory import Factory
@@ -8,6 +8,22 @@ from .interfaces import IRegionalAccounts, IRegionalAccountSet
 from .regional_accounts import regional_accounts_factory
 
 
+# classes known to implement IRegionalAccounts (implementation declarations are only ever added)
+_implementing_classes = set()
+
+
+def _validate(regional_accounts):
+    """Raise ValueError if regional_accounts doesn't provide IRegionalAccounts."""
+    # pylint: disable=no-value-for-parameter
+    cls = type(regional_accounts)
+    if cls in _implementing_classes:
+        return
+    if IRegionalAccounts.implementedBy(cls):
+        _implementing_classes.add(cls)
+    elif not IRegionalAccounts.providedBy(regional_accounts):  # i.e. directly provided by the instance
+        raise ValueError(regional_accounts)
+
+
 @interface.implementer(IRegionalAccountSet)
 class RegionalAccountSet:
     """A container of cs.aws_account.regional_accounts.RegionalAccounts instances.
@@ -22,43 +38,41 @@ class RegionalAccountSet:
         arbitrary list of RegionalAccounts objects to instantiate the active set with
     """
 
+    __slots__ = ('_regional_accounts', '_lock', '__weakref__', '__provides__')  # __provides__: for alsoProvides()
+
     # pylint: disable=no-value-for-parameter
     def __init__(self, *args):
         """Initialize the RegionalAccountSet."""
-        self._regional_accounts = set()
-        self._lock = RLock()
         for regional_account in args:
-            if not IRegionalAccounts.providedBy(regional_account):
-                raise ValueError(regional_account)
-            self._regional_accounts.add(regional_account)
+            _validate(regional_account)
+        # copy-on-write: writers publish a new frozenset under the lock, readers don't lock
+        self._regional_accounts = frozenset(args)
+        self._lock = Lock()
 
     def add(self, regional_accounts):
         """Add RegionalAccounts instance to include for iteration if not available."""
-        if not IRegionalAccounts.providedBy(regional_accounts):
-            raise ValueError(regional_accounts)
+        _validate(regional_accounts)
         with self._lock:
-            self._regional_accounts.add(regional_accounts)
+            self._regional_accounts = self._regional_accounts | {regional_accounts}
 
     def discard(self, regional_accounts):
         """Discard RegionalAccounts instance from iteration if available."""
-        if not IRegionalAccounts.providedBy(regional_accounts):
-            raise ValueError(regional_accounts)
+        _validate(regional_accounts)
         with self._lock:
-            self._regional_accounts.discard(regional_accounts)
+            self._regional_accounts = self._regional_accounts - {regional_accounts}
 
     def values(self):
         """Frozenset of available RegionalAccounts providers."""
-        with self._lock:
-            return frozenset(list(self._regional_accounts))
+        return self._regional_accounts
 
     def __iter__(self):
         """Iterate over unique RegionalAccount instances from available RegionalAccounts instances."""
-        regional_accounts = []
-        with self._lock:
-            for regional_account in self._regional_accounts:
-                regional_accounts.extend(list(regional_account.values()))
-            regional_accounts = set(regional_accounts)
-        return iter(regional_accounts)
+        seen = set()
+        for regional_accounts in self._regional_accounts:  # copy-on-write snapshot
+            for regional_account in regional_accounts.values():
+                if regional_account not in seen:
+                    seen.add(regional_account)
+                    yield regional_account
 
 
 RegionalAccountSetFactory = Factory(RegionalAccountSet)
@@ -1,17 +1,23 @@
 """Components for interacting with Regional Accounts, which are containers for RegionalAccount instances."""
-from threading import RLock
+from threading import Lock
 
-from cachetools import cached, TTLCache
+from cachetools import LRUCache
 from zope import interface
 from zope.component.factory import Factory
 from zope.schema.fieldproperty import FieldProperty
 
 from .account import account_factory
-from .caching_key import aggregated_string_hash
+from .caching import cached_keyed_lock
+from .caching_key import freeze
 from .interfaces import IRegionalAccounts
 from .regional_account import regional_account_factory
 
 
+# botocore's endpoint data is static for the life of the process, so the
+# available regions are cached by (service, partition_name, allow_non_regional)
+_available_regions = {}
+
+
 @interface.implementer(IRegionalAccounts)
 class RegionalAccounts:
     """Enumerable read-only mapping of RegionalAccount instances.
@@ -43,106 +49,135 @@ class RegionalAccounts:
           cs.ratelimit.components.ratelimitproperties_factory factory specs
         service: boto3.session.Session.Client() service used as reference to
                  build region name lists.
+        ResponseCacheTTL: optional mapping of 'service:method' strings to
+          response cache seconds for the RegionalAccount values
+        CoalescePrefixes: optional list of method name prefixes whose
+          concurrent identical calls are coalesced by the RegionalAccount values
     """
 
-    # pylint: disable=too-many-instance-attributes, too-many-arguments, consider-using-generator, invalid-name
+    # pylint: disable=too-many-instance-attributes, too-many-arguments, invalid-name
 
     filter = FieldProperty(IRegionalAccounts['filter'])
 
-    def __init__(self, RateLimit, Account, Filter=None, RateLimitRegionSpec=None, service='ec2'):
+    def __init__(self, RateLimit, Account, Filter=None, RateLimitRegionSpec=None, service='ec2', *,
+                 ResponseCacheTTL=None, CoalescePrefixes=None):
         """Initialize the RegionalAccounts container."""
         self.filter = Filter if Filter else {}
 
         self._rate_limit = RateLimit
         self._account_properties = Account
-        self._account = account_factory(**Account)
+        self._account = None  # built on first use by account()
         self._service = service
         self._rate_limit_region_spec = RateLimitRegionSpec if RateLimitRegionSpec else {}
+        self._response_cache_ttl = ResponseCacheTTL
+        self._coalesce_prefixes = CoalescePrefixes
 
-        self._rlock = RLock()
+        self._lock = Lock()
         self._regional_accounts = {}
+        self._regions_cache = (None, None)  # (frozen filter, frozenset of region names)
 
     def _get_regional_account(self, region_name):
-        with self._rlock:
-            try:
-                return self._regional_accounts[region_name]
-            except KeyError:
-                self._regional_accounts[region_name] = regional_account_factory(
-                    self._rate_limit_region_spec[region_name] if region_name in
-                    self._rate_limit_region_spec else self._rate_limit, self._account_properties, region_name)
-            return self._regional_accounts[region_name]
+        # No lock needed: dict reads/writes are atomic and the caching factory
+        # returns the same object to concurrent callers, so racing misses store
+        # the same value.
+        regional_accounts = self._regional_accounts
+        regional_account = regional_accounts.get(region_name)
+        if regional_account is None:
+            regional_account = regional_accounts[region_name] = regional_account_factory(
+                self._rate_limit_region_spec.get(region_name, self._rate_limit), self._account_properties,
+                region_name, self._response_cache_ttl, self._coalesce_prefixes)
+        return regional_account
 
     def account(self):
         """Return the accounts wrapped by this RegionalAccounts instance."""
-        return self._account
+        account = self._account
+        if account is None:
+            with self._lock:
+                if self._account is None:
+                    self._account = account_factory(**self._account_properties)
+                account = self._account
+        return account
 
     def __getitem__(self, key):
         """Get the requested regional account or raise as part of IEnumerableMapping."""
-        if key not in self:
+        if key not in self._regions():
             raise KeyError(key)
         return self._get_regional_account(key)
 
     def get(self, key, default=None):
         """Get an attribute or return the default as part of IEnumerableMapping."""
-        try:
-            return self[key]
-        except KeyError:
-            return default
+        if key in self._regions():
+            return self._get_regional_account(key)
+        return default
 
     def __contains__(self, key):
         """Return whether the requested regional account is held by this wrapper as part of IEnumerableMapping."""
-        return key in self.__iter__()
+        return key in self._regions()
 
     def keys(self):
         """Return the requested regional account key held by this wrapper as part of IEnumerableMapping."""
         return (k for k in self)
 
-    @cached(cache=TTLCache(maxsize=1000, ttl=86400))
     def _all_regions(self, partition_name, allow_non_regional):
-        return self.account().session().boto3().get_available_regions(
+        key = (self._service, partition_name, allow_non_regional)
+        regions = _available_regions.get(key)
+        if regions is None:
+            regions = _available_regions[key] = tuple(self.account().session().boto3().get_available_regions(
                                 self._service,
                                 partition_name=partition_name,
-                                allow_non_regional=allow_non_regional)
-
-    def __iter__(self):
-        """Iterate over all regions in this wrapper as part of IEnumerableMapping."""
+                                allow_non_regional=allow_non_regional))
+        return regions
+
+    def _regions(self):
+        """Return frozenset of the region names selected by the filter.
+
+        The result is memoized until the (mutable) filter changes.
+        """
+        filter_key = freeze(self.filter)
+        cached_filter_key, regions = self._regions_cache
+        if regions is not None and cached_filter_key == filter_key:
+            return regions
+        regions = self._compute_regions()
+        self._regions_cache = (filter_key, regions)
+        return regions
+
+    def _compute_regions(self):
         partitions = self.filter.get('Partitions', {'aws': None})
 
         regions = set()
-        for name in set(partitions):
-            p_config = partitions[name]
-            if not p_config:
-                p_config = {}
-            include_non_regional = p_config.get('IncludeNonRegional', False)
-            all_regions = self._all_regions(name, include_non_regional)
-
-            region_include = set(p_config.get('Regions', {}).get('include', {}))
-            if not region_include:
-                region_include = set(all_regions)
-            region_exclude = set(p_config.get('Regions', {}).get('exclude', {}))
-            regions.update(region_include - region_exclude)
-
-        for region in regions:
-            yield region
+        for name, p_config in partitions.items():
+            p_config = p_config or {}
+            region_spec = p_config.get('Regions', {})
+            # only look up the available regions when there's no explicit include list
+            region_include = region_spec.get('include') or \
+                self._all_regions(name, p_config.get('IncludeNonRegional', False))
+            region_exclude = frozenset(region_spec.get('exclude', ()))
+            regions.update(region for region in region_include if region not in region_exclude)
+
+        return frozenset(regions)
+
+    def __iter__(self):
+        """Iterate over all regions in this wrapper as part of IEnumerableMapping."""
+        return iter(self._regions())
 
     def values(self):
         """Return all regional accounts in this wrapper as part of IEnumerableMapping."""
-        return tuple([self[k] for k in self])
+        return tuple(self._get_regional_account(k) for k in self._regions())
 
     def items(self):
         """Return key and account for all regional accounts in this wrapper as part of IEnumerableMapping."""
-        return tuple([(k, self[k]) for k in self])
+        return tuple((k, self._get_regional_account(k)) for k in self._regions())
 
     def __len__(self):
         """Return the number of regional accounts held in this wrapper as part of IEnumerableMapping."""
-        return len(list(iter(self)))
+        return len(self._regions())
 
 
 RegionalAccountsFactory = Factory(RegionalAccounts)
 
 
 @interface.implementer(IRegionalAccounts)
-@cached(cache={}, key=aggregated_string_hash, lock=RLock())
+@cached_keyed_lock(cache=LRUCache(maxsize=1024))
 def regional_accounts_factory(**kwargs):
     """Create and cache a cs.aws_account.regional_accounts.RegionalAccounts instance.
 
@@ -157,6 +192,8 @@ def regional_accounts_factory(**kwargs):
         Filter: optional valid dict filter specification
         RateLimitRegionSpec: optional per-region rate limit specs
         service: optional boto3 client service reference to build region specs from
+        ResponseCacheTTL: optional per-method response cache seconds
+        CoalescePrefixes: optional method name prefixes of coalesced calls
 
     Returns:
         cs.aws_account.regional_accounts.RegionalAccounts object
@@ -1,4 +1,6 @@
 """Retry module for AWS throttling error."""
+import random
+import re
 import time
 import logging
 
@@ -7,41 +9,50 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# error message substrings identifying AWS throttling errors
+_THROTTLING_RE = re.compile('throttling|rate exceeded', re.IGNORECASE)
+
 
 def aws_throttling_retry(max_retries=5, base=0.5, growth_factor=0.5):
     """Retry AWS throttling errors with exponential backoff time.
 
-    Calculate time to sleep based on below function.
+    Calculate the maximum time to sleep based on below function.
     The format is::
         base + (retries * growth_factor)
 
+    The actual sleep time is drawn uniformly between base and that maximum
+    (jitter), so that concurrently throttled calls don't all retry at the
+    same instant.
+
     Kwargs:
     max_retries: Max number of retries when hitting AWS throttling error
     base: base time for exponential backoff calculation
     growth_factor: growth factor used to calculate sleeping time for every retry
     """
-    def decorator_retry(func):
-        def wrapper(*args, **kwargs):  # pylint: disable=inconsistent-return-statements
-            if max_retries < 1:
-                raise ValueError("max_retries can't be less than 1")
+    if max_retries < 1:
+        raise ValueError("max_retries can't be less than 1")
+    # maximum sleep times between consecutive attempts
+    schedule = tuple(base + (retries * growth_factor) for retries in range(1, max_retries))
 
-            retries = 0
-            while retries < max_retries:
+    def decorator_retry(func):
+        def wrapper(*args, **kwargs):
+            for max_backoff_seconds in schedule:
                 try:
                     return func(*args, **kwargs)
                 except Exception as error:  # pylint: disable=broad-exception-caught
-                    err_str = str(error).lower()
-                    if 'throttling' in err_str or 'rate exceeded' in err_str:
-                        retries += 1
-                        if retries >= max_retries:
-                            logger.warning("Received AWS throttling error. Exhausted all attempts.")
-                            raise error
-                        backoff_seconds = base + (retries * growth_factor)
-                        logger.warning("Received AWS throttling error. Retrying in %s seconds...",
-                                       backoff_seconds)
-                        time.sleep(backoff_seconds)
-                    else:
-                        raise error
+                    if not _THROTTLING_RE.search(str(error)):
+                        raise
+                    # jitter, not security: no need for a cryptographic generator
+                    backoff_seconds = random.uniform(base, max_backoff_seconds)  # nosec B311
+                    logger.warning("Received AWS throttling error. Retrying in %s seconds...",
+                                   backoff_seconds)
+                    time.sleep(backoff_seconds)
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                if _THROTTLING_RE.search(str(error)):
+                    logger.warning("Received AWS throttling error. Exhausted all attempts.")
+                raise
         return wrapper
 
     return decorator_retry
@@ -1,30 +1,41 @@
 """Provides an optimized thread-safe boto3 session wrapper."""
 # pylint: disable=invalid-name
 from collections.abc import Mapping
-from threading import local, RLock
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from threading import local, Lock, RLock
+from types import MappingProxyType
 from typing import Optional
+import hashlib
+import json
 import logging
-import operator
+import math
+import os
+import re
+import time
+import weakref
 
-from boto3.session import Session as botoSession
-from botocore.credentials import RefreshableCredentials
-from botocore.session import get_session
-from cachetools import cached, cachedmethod, Cache
+from cachetools import LRUCache
 from zope import interface
 from zope.component.factory import Factory
 from zope.interface.common.collections import IMutableMapping
 
-from .caching_key import aggregated_string_hash
+from .caching import cached_keyed_lock
+from .caching_key import freeze
+from .clients import get_client
 from .interfaces import ISession
+from .monkies import patch_botocore_loader, share_loader
 from .retry import aws_throttling_retry
 
 logger = logging.getLogger(__name__)
 
+patch_botocore_loader()
+
 
 # Region list as of 2022-10-27. Note: A more future proof solution would be
 # to leverage boto3.get_available_regions, but we do this instead to prevent
 # additional API calls.
-AWS_REGIONS = set([
+AWS_REGIONS = frozenset([
     'af-south-1', 'ap-east-1', 'ap-northeast-1', 'ap-northeast-2', 'ap-northeast-3',
     'ap-south-1', 'ap-southeast-1', 'ap-southeast-2', 'ap-southeast-3', 'ca-central-1',
     'eu-central-1', 'eu-north-1', 'eu-south-1', 'eu-west-1', 'eu-west-2', 'eu-west-3',
@@ -32,9 +43,134 @@ AWS_REGIONS = set([
     'us-gov-east-1', 'us-gov-west-1'
 ])
 
+# matches AWS_REGIONS entries that are whole dot-separated parts of an endpoint url
+_AWS_REGION_RE = re.compile(
+    r'(?<![^.])(' + '|'.join(re.escape(region) for region in sorted(AWS_REGIONS)) + r')(?![^.])')
+
+
+# Minimum number of seconds a credential from the on-disk cache must remain
+# valid to be reused (botocore's advisory refresh window).
+CREDENTIAL_CACHE_MIN_TTL = 900
+
+# (advisory, mandatory) refresh windows of roles assumed for no longer than
+# botocore's advisory window, whose credentials would otherwise be refreshed
+# on every use.
+SHORT_ROLE_REFRESH_TIMEOUTS = (120, 60)
+
+# Number of lock stripes guarding the creation of assumed role credentials
+# (must be a power of 2).
+CREDENTIAL_LOCK_STRIPES = 16
+
+# Assumed role credentials shared among the Session objects of the process,
+# keyed like Session._credentials (the source identity is the chain of its stack keys).
+_shared_credentials = weakref.WeakValueDictionary()
+_shared_credentials_lock = Lock()
+
+# sts.get_caller_identity() responses shared among the Session objects of the
+# process, keyed by access key (which only ever belongs to a single principal).
+_caller_identities = LRUCache(maxsize=1024)
+_caller_identities_lock = Lock()
+
+
+def _endpoint_region(endpoint_url):
+    """Return the (last) AWS region named in a custom endpoint url, else None."""
+    regions = _AWS_REGION_RE.findall(endpoint_url)
+    return regions[-1] if regions else None
+
+
+def _resolve_service_endpoints(service_endpoints):
+    """Return a {(service, region): endpoint_url} map of the usable custom endpoints.
+
+    A custom endpoint is only usable for the region it names, since boto3
+    requires a matching region if endpoint_url is also given.
+    """
+    resolved = {}
+    for service, endpoint_urls in service_endpoints.items():
+        # handle cross-region custom endpoints
+        if not isinstance(endpoint_urls, Mapping):
+            endpoint_urls = {None: endpoint_urls}
+        for region, endpoint_url in endpoint_urls.items():
+            if not endpoint_url:
+                continue
+            endpoint_region = _endpoint_region(endpoint_url)
+            if endpoint_region and region in (None, endpoint_region):
+                resolved[(service, endpoint_region)] = endpoint_url
+    return resolved
+
+
+def botoSession(**kwargs):
+    """Return a new boto3.session.Session.
+
+    boto3 (and its s3transfer import graph) is only imported once the first
+    boto3 session is built, which keeps importing this module cheap.  The
+    botocore credential and session modules are deferred the same way.
+    """
+    from boto3.session import Session as _Boto3Session  # pylint: disable=import-outside-toplevel
+    return _Boto3Session(**kwargs)
+
+
+def _credential_cache_key(chain, sts_method, kwargs):
+    """Return a process independent credential cache key for a role assumption.
+
+    Like the Session._credentials keys, the key includes the chain of stack
+    keys the role is assumed from (the source identity), so sessions of
+    different source identities never load each other's credentials.
+    """
+    role = json.dumps([chain, sts_method, kwargs], sort_keys=True, default=str)
+    return hashlib.sha256(role.encode('utf-8')).hexdigest()
+
+
+def _cached_credentials(credential_cache, cache_key, min_ttl=CREDENTIAL_CACHE_MIN_TTL):
+    """Return credential metadata from the cache if it is valid for more than min_ttl seconds, else None."""
+    try:
+        metadata = credential_cache[cache_key]
+        expiry_time = datetime.fromisoformat(metadata['expiry_time'])
+        if (expiry_time - datetime.now(timezone.utc)).total_seconds() <= min_ttl:
+            return None
+    except (KeyError, TypeError, ValueError):  # TypeError: i.e. a naive expiry time
+        return None
+    return metadata
+
+
+def _seed_caller_identity(access_key, assumed_role_user):
+    """Cache the caller identity of freshly assumed role credentials.
+
+    The AssumeRole* responses already describe the assumed role user, which
+    spares the sts:GetCallerIdentity call of the first account_id(),
+    user_id() or arn() lookup.
+    """
+    if not assumed_role_user:
+        return
+    arn = assumed_role_user['Arn']  # arn:aws:sts::<account>:assumed-role/<role>/<session>
+    identity = {'UserId': assumed_role_user['AssumedRoleId'], 'Account': arn.split(':')[4], 'Arn': arn}
+    with _caller_identities_lock:
+        _caller_identities[access_key] = identity
+
+
+def _use_credential_cache(botocore_session, credential_cache):
+    """Have the role assuming providers of a botocore credential chain use credential_cache.
+
+    Covers the roles botocore assumes itself for a profile (role_arn,
+    web_identity_token_file).
+    """
+    resolver = botocore_session.get_component('credential_provider')
+    for provider in resolver.providers:
+        if provider.METHOD in ('assume-role', 'assume-role-with-web-identity'):
+            provider.cache = credential_cache
+
+
+class _LocalStack(local):  # pylint: disable=too-few-public-methods
+    """Threadlocal boto3 stack of a Session.
+
+    (master stack version the stack was built against, tuple of the stack
+    entry keys, parallel tuple of boto3 sessions)
+    """
+
+    stack = (-1, (), ())
+
 
 @interface.implementer(ISession)
-class Session:
+class Session:  # pylint: disable=too-many-instance-attributes
     """Thread-safe boto3 Session accessor.
 
     Provides convenient access to boto3.session.Session() objects even in
@@ -45,36 +181,117 @@ class Session:
 
     Kwargs:
         [boto3.session.Session]: See boto3.session.Session for available kwargs
+        cache_ttl: optional number of seconds to keep the memoized values
+                   (access key, caller identity).  Defaults to the life of
+                   the active role.
+        time_source: optional monotonic clock of the cache_ttl expiries, in
+                   seconds (defaults to time.monotonic)
+        ShareCredentials: share assumed role credentials with other Session
+                   objects of the process assuming the same role from the
+                   same source identity (defaults to True, pass False for
+                   credentials of this Session's own)
+        refresh_timeouts: optional (advisory, mandatory) number of seconds
+                   before expiry at which assumed role credentials are
+                   refreshed (botocore defaults to 15 and 10 minutes,
+                   SHORT_ROLE_REFRESH_TIMEOUTS for roles assumed with a
+                   DurationSeconds of 15 minutes or less, which would
+                   otherwise be refreshed on every use).  Longer windows
+                   trade STS calls for fewer expiry related failures.
+                   Credentials shared with other Session objects keep the
+                   windows of their creator.
     """
 
-    # pylint: disable=too-many-instance-attributes, protected-access
+    __slots__ = ('_service_endpoints', '_resolved_endpoints', '_credential_cache', '_cache_ttl', '_time_source',
+                 '_share_credentials', '_refresh_timeouts', '_local', '_stack_keys', '_stack_kwargs',
+                 '_stack_version', '_rlock', '_client_kwargs', '_client_kwargs_by_service', '_credentials',
+                 '_credential_locks', '_credentials_inflight', '_memoized_inflight', '_memo_stack',
+                 '_base_credentials', '_base_credentials_inflight', '_base_credentials_lock', '_data_loader',
+                 '_cache_access_key', '_cache_caller_identity', '__weakref__',
+                 '__provides__')  # for zope.interface.alsoProvides()
+
+    # pylint: disable=protected-access
 
     def _reset_caches(self):
-        """Reset the memoizing decorator caches."""
+        """Reset the memoized values."""
         with self._rlock:
-            self._cache_access_key = Cache(maxsize=1)
-            self._cache_account_id = Cache(maxsize=1)
-            self._cache_user_id = Cache(maxsize=1)
-            self._cache_arn = Cache(maxsize=1)
+            self._cache_access_key = (None, 0.0)  # (value, monotonic expiry time)
+            self._cache_caller_identity = (None, 0.0)
 
-    def __init__(self, **SessionParameters):
-        """Set up the thread safety and threadlocal data."""
+    def _memoized(self, cache_attr, func):
+        """Return the value memoized in the cache_attr attribute, or else func()'s result.
 
-        class TLBoto3(local):  # pylint: disable=too-few-public-methods
-            """Threadlocal boto3 client stack."""
-
-            boto3 = []  # threadlocal stack
+        Hits are served without a lock.  On a miss, the first caller runs
+        func() without holding the lock while concurrent callers wait for its
+        result.  The result is not memoized if the active role changed in
+        the meantime.
+        """
+        value, expiry = getattr(self, cache_attr)
+        if self._time_source() < expiry:
+            return value
+        with self._rlock:
+            value, expiry = getattr(self, cache_attr)
+            if self._time_source() < expiry:
+                return value
+            version = self._stack_version
+            key = (cache_attr, version)
+            future = self._memoized_inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._memoized_inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            value = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            with self._rlock:
+                if version == self._stack_version:
+                    ttl = self._cache_ttl
+                    setattr(self, cache_attr, (value, math.inf if ttl is None else self._time_source() + ttl))
+            future.set_result(value)
+            return value
+        finally:
+            with self._rlock:
+                del self._memoized_inflight[key]
 
+    def __init__(self, **SessionParameters):
+        """Set up the thread safety and threadlocal data."""
         # We can't use the ServiceEndpoints directly in boto3 session creation,
         # so we apply them to each client, depending on which service the
-        # client is for, instead of adding them to the `_stack`.
+        # client is for, instead of adding them to the master stack.
         self._service_endpoints = SessionParameters.pop('ServiceEndpoints', {})
-
-        self._local = TLBoto3()  # threadlocal data to protect the non-TS low-level Boto3 session
-        self._stack = [(aggregated_string_hash(SessionParameters), SessionParameters)]  # master stack
+        self._resolved_endpoints = _resolve_service_endpoints(self._service_endpoints)
+        # Optional directory to share assumed role credentials across processes.
+        credential_cache_dir = SessionParameters.pop('CredentialCacheDir', None)
+        self._credential_cache = None
+        if credential_cache_dir:
+            from botocore.credentials import JSONFileCache  # pylint: disable=import-outside-toplevel
+            self._credential_cache = JSONFileCache(os.path.expanduser(credential_cache_dir))
+        self._cache_ttl = SessionParameters.pop('cache_ttl', None)
+        self._time_source = SessionParameters.pop('time_source', time.monotonic)
+        self._share_credentials = SessionParameters.pop('ShareCredentials', True)
+        self._refresh_timeouts = SessionParameters.pop('refresh_timeouts', None)
+
+        self._local = _LocalStack()  # threadlocal data to protect the non-TS low-level Boto3 session
+        # master stack, as parallel sequences of the entry keys and kwargs
+        self._stack_keys = (freeze(SessionParameters),)
+        self._stack_kwargs = [SessionParameters]
+        self._stack_version = 0  # incremented on every master stack change
         self._rlock = RLock()
         self._client_kwargs = {}
-        self._credentials = {}
+        self._client_kwargs_by_service = {}
+        self._credentials = {}  # (chain, sts_method, role_id) -> RefreshableCredentials
+        self._credential_locks = tuple(Lock() for _ in range(CREDENTIAL_LOCK_STRIPES))
+        self._credentials_inflight = {}  # key -> Future of the role assumption in progress
+        self._memoized_inflight = {}  # (cache attribute, stack version) -> Future of the refresh in progress
+        self._memo_stack = []  # memoized values of the roles below the active one, restored by revert()
+        self._base_credentials = {}
+        self._base_credentials_inflight = {}  # key -> Future of the resolution in progress
+        # not self._rlock: revert() waits on the resolution while holding it
+        self._base_credentials_lock = Lock()
+        self._data_loader = None  # botocore Loader shared by the boto3 sessions of all threads
         if 'region_name' in SessionParameters:
             self._client_kwargs['region_name'] = SessionParameters['region_name']
         self._reset_caches()
@@ -84,97 +301,234 @@ class Session:
 
         Only one botocore.credentials.RefreshableCredentials object should
         be needed per assume-role based boto3 session objects.  To prevent
-        un-needed api calls for threaded usage, we'll syncronize access to an
-        object-level storage.
+        un-needed api calls for threaded usage, concurrent callers for the
+        same credentials wait for the first one to assume the role.
 
         Same args as _assume_role().
         """
         # botocore.credentials.RefreshableCredentials is seemingly thread-safe
-        hash_ = boto3_session._aws_account_hash
-        role_id = "".join([str(v) for v in kwargs.values()])
-        with self._rlock:
-            if hash_ not in self._credentials:
-                self._credentials[hash_] = {}
-            if sts_method not in self._credentials[hash_]:
-                self._credentials[hash_][sts_method] = {}
-            if role_id not in self._credentials[hash_][sts_method]:
-                self._credentials[hash_][sts_method][role_id] = None
-
-            if not self._credentials[hash_][sts_method][role_id]:
-
-                def refresh():
-                    logger.debug(
-                        "Refreshing assumed role credentials for ARN %s with session name %s",
-                        kwargs.get('RoleArn', ''), kwargs.get('RoleSessionName', ''))
-                    assume_role = getattr(boto3_session.client('sts', **self.client_kwargs(service='sts')), sts_method)
-                    logger.debug("Attempting to assumed AWS Role with data %s", kwargs)
-                    credentials = assume_role(**kwargs)['Credentials']
-                    logger.info("Assumed AWS Role with data %s", kwargs)
-                    # mapping keys common among all assume_role call variations
-                    return {
-                        'access_key': credentials['AccessKeyId'],
-                        'secret_key': credentials['SecretAccessKey'],
-                        'token': credentials['SessionToken'],
-                        'expiry_time': credentials['Expiration'].isoformat(),
-                    }
-
-                session_credentials = RefreshableCredentials.create_from_metadata(
-                    metadata=refresh(),
-                    refresh_using=refresh,
-                    method=f"sts-{sts_method.replace('_', '-')}")  # assume_role -> sts-assume-role
-                self._credentials[hash_][sts_method][role_id] = session_credentials
-
-            return self._credentials[hash_][sts_method][role_id]
+        chain = boto3_session._aws_account_chain  # identifies the source identity
+        role_id = freeze(kwargs)  # sorted (key, value) pairs; nested lists (i.e. Tags) become tuples
+        key = (chain, sts_method, role_id)
+        session_credentials = self._credentials.get(key)  # dict reads are atomic
+        if session_credentials is not None:
+            return session_credentials
+
+        # striped locks keep unrelated role assumptions from waiting on each
+        # other, and are not held while the role is being assumed.
+        lock = self._credential_locks[hash(key) & (CREDENTIAL_LOCK_STRIPES - 1)]
+        with lock:
+            session_credentials = self._credentials.get(key)
+            if session_credentials is not None:
+                return session_credentials
+            future = self._credentials_inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._credentials_inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            session_credentials = self._new_credentials(boto3_session, key, sts_method, kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            with lock:
+                self._credentials[key] = session_credentials
+            future.set_result(session_credentials)
+            return session_credentials
+        finally:
+            with lock:
+                del self._credentials_inflight[key]
+
+    def _new_credentials(self, boto3_session, key, sts_method, kwargs):
+        """Return the (shared) RefreshableCredentials for the role assumption."""
+        if self._share_credentials:
+            with _shared_credentials_lock:
+                session_credentials = _shared_credentials.get(key)
+            if session_credentials is not None:
+                return session_credentials
+
+        refresh_timeouts = self._refresh_timeouts
+        if not refresh_timeouts and kwargs.get('DurationSeconds', 3600) <= CREDENTIAL_CACHE_MIN_TTL:
+            refresh_timeouts = SHORT_ROLE_REFRESH_TIMEOUTS
+        min_ttl = refresh_timeouts[0] if refresh_timeouts else CREDENTIAL_CACHE_MIN_TTL
+
+        credential_cache = self._credential_cache
+        cache_key = _credential_cache_key(key[0], sts_method, kwargs) if credential_cache is not None else None
+
+        def refresh():
+            if credential_cache is not None:
+                metadata = _cached_credentials(credential_cache, cache_key, min_ttl)
+                if metadata:
+                    logger.debug("Using cached assumed role credentials for ARN %s", kwargs.get('RoleArn', ''))
+                    return metadata
+            logger.debug(
+                "Refreshing assumed role credentials for ARN %s with session name %s",
+                kwargs.get('RoleArn', ''), kwargs.get('RoleSessionName', ''))
+            assume_role = getattr(self._sts_client(boto3_session), sts_method)
+            logger.debug("Attempting to assumed AWS Role with data %s", kwargs)
+            response = assume_role(**kwargs)
+            credentials = response['Credentials']
+            logger.info("Assumed AWS Role with data %s", kwargs)
+            _seed_caller_identity(credentials['AccessKeyId'], response.get('AssumedRoleUser'))
+            # mapping keys common among all assume_role call variations
+            metadata = {
+                'access_key': credentials['AccessKeyId'],
+                'secret_key': credentials['SecretAccessKey'],
+                'token': credentials['SessionToken'],
+                'expiry_time': credentials['Expiration'].isoformat(),
+            }
+            if credential_cache is not None:
+                try:
+                    credential_cache[cache_key] = metadata
+                except OSError:
+                    logger.warning("Unable to cache assumed role credentials for ARN %s",
+                                   kwargs.get('RoleArn', ''), exc_info=True)
+            return metadata
+
+        from botocore.credentials import RefreshableCredentials  # pylint: disable=import-outside-toplevel
+        session_credentials = RefreshableCredentials.create_from_metadata(
+            metadata=refresh(),
+            refresh_using=refresh,
+            method=f"sts-{sts_method.replace('_', '-')}")  # assume_role -> sts-assume-role
+        if refresh_timeouts:
+            # attributes rather than create_from_metadata() kwargs, which older botocore lacks
+            session_credentials._advisory_refresh_timeout, session_credentials._mandatory_refresh_timeout = \
+                refresh_timeouts
+        if self._share_credentials:
+            with _shared_credentials_lock:
+                session_credentials = _shared_credentials.setdefault(key, session_credentials)
+        return session_credentials
+
+    def _sts_client(self, boto3_session):
+        """Return the (pooled) STS client of a threadlocal boto3 session."""
+        return get_client(boto3_session, 'sts', **self._client_kwargs_view('sts'))
+
+    def _share_base_credentials(self, key, boto3_session):
+        """Resolve the credentials of a threadlocal root boto3 session once for all threads.
+
+        Each thread builds its own root boto3 session, which would otherwise
+        walk the botocore credential provider chain (environment, config
+        files, IMDS, credential_process, ...) again.  botocore credential
+        objects are thread-safe, so they're shared among the threadlocal
+        sessions built from the same parameters.  Threads starting
+        concurrently wait for the first one to resolve them.
+        """
+        botocore_session = boto3_session._session
+        with self._base_credentials_lock:
+            credentials = self._base_credentials.get(key)
+            if credentials is None:
+                future = self._base_credentials_inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._base_credentials_inflight[key] = Future()
+        if credentials is None:
+            if not leader:
+                credentials = future.result()
+            else:
+                try:
+                    if self._credential_cache is not None:
+                        _use_credential_cache(botocore_session, self._credential_cache)
+                    credentials = botocore_session.get_credentials()  # may require network calls
+                except BaseException as exc:
+                    future.set_exception(exc)
+                    raise
+                else:
+                    if credentials is not None:
+                        with self._base_credentials_lock:
+                            self._base_credentials[key] = credentials
+                    future.set_result(credentials)
+                finally:
+                    with self._base_credentials_lock:
+                        del self._base_credentials_inflight[key]
+            if credentials is None:
+                return
+        botocore_session._credentials = credentials
+
+    def _root_session(self, kwargs):
+        """Return a new threadlocal root boto3 session.
+
+        The root sessions of all threads share a single data loader, so the
+        service models, endpoints and paginators are only loaded once
+        rather than once per thread.
+        """
+        loader = self._data_loader
+        if loader is None or 'botocore_session' in kwargs:
+            boto_session = botoSession(**kwargs)
+            with self._rlock:
+                if self._data_loader is None:
+                    self._data_loader = share_loader(boto_session._session.get_component('data_loader'))
+            return boto_session
+        from botocore.session import get_session  # pylint: disable=import-outside-toplevel
+        session = get_session()
+        session.register_component('data_loader', loader)
+        return botoSession(botocore_session=session, **kwargs)
 
     def _assume_role(self, boto3_session, sts_method='assume_role', **kwargs):
         """Stateless assume role call; returns Boto3 session with role assumption."""
         # https://programtalk.com/python-examples/botocore.credentials.RefreshableCredentials.create_from_metadata/
+        from botocore.session import get_session  # pylint: disable=import-outside-toplevel
         session = get_session()
+        # reuse the source session's (same thread) data loader and its loaded service models
+        parent = boto3_session._session
+        session.register_component('data_loader', parent.get_component('data_loader'))
         session._credentials = self._get_credentials(boto3_session, sts_method, **kwargs)
         return botoSession(botocore_session=session)
 
     def boto3(self):
         """Return threadlocal active boto3.session.Session object."""
+        # lock-free fast path: the threadlocal stack is current if it was
+        # built against the current version of the master stack.
+        version, keys, sessions = self._local.stack
+        if version != self._stack_version:
+            sessions = self._sync_threadlocal_stack(keys, sessions)
+        boto_session = sessions[-1]  # return lifo entry from threadlocal stack
+        if logger.isEnabledFor(logging.DEBUG):  # resolving the credentials isn't free
+            logger.debug("Returning Boto3.Session object with access key %s", boto_session.get_credentials().access_key)
+        return boto_session
+
+    def _sync_threadlocal_stack(self, keys, sessions):
+        """Reconcile the threadlocal boto3 stack with the master stack; return the new boto3 sessions."""
         with self._rlock:
-            # make sure threadlocal boto3 stack entries are valid
-            for i, _hash, _ in [(i, b3[0], b3[1],) for i, b3 in enumerate(self._local.boto3)]:
-                try:
-                    if _hash != self._stack[i][0]:
-                        self._local.boto3 = self._local.boto3[:i]
-                        break
-                except IndexError:
-                    self._local.boto3 = self._local.boto3[:i]
-                    break
-
-            # reduce threadlocal boto3 stack, if needed
-            self._local.boto3 = self._local.boto3[:len(self._stack)]
+            version = self._stack_version
+            # keep the threadlocal boto3 stack entries that are still valid
+            valid = len(keys)
+            if keys != self._stack_keys[:valid]:  # common case: a still valid prefix
+                pairs = enumerate(zip(keys, self._stack_keys))
+                valid = next((i for i, (local_key, key) in pairs if local_key != key),
+                             len(self._stack_keys))  # stack reverted below the threadlocal one
+                keys, sessions = keys[:valid], sessions[:valid]
             # rebuild the stack so we can safely reference info in unlocked state.
-            stack = [t for t in self._stack[len(self._local.boto3):]]  # pylint: disable=unnecessary-comprehension
+            stack = tuple(zip(self._stack_keys[valid:], self._stack_kwargs[valid:]))
 
         # Do these tasks outside the lock to allow concurrent calls
         # to independently build the threadlocal boto3 object
         # logger.debug("Preparing threadlocal stack")
-        for hash_, kwargs in stack:
-            if not self._local.boto3:
-                boto_session = botoSession(**kwargs)
-                boto_session._aws_account_hash = hash_  # mark the object with its hash
-                self._local.boto3.append((hash_, boto_session,))
+        for key, kwargs in stack:
+            if not sessions:
+                boto_session = self._root_session(kwargs)
+                self._share_base_credentials(key, boto_session)
             else:
-                boto_session = self._assume_role(self._local.boto3[-1][1], **kwargs)
-                boto_session._aws_account_hash = hash_  # mark the object with its hash
-                self._local.boto3.append((hash_, boto_session,))
-        boto_session = self._local.boto3[-1][1]  # return lifo entry from threadlocal stack
-        logger.debug("Returning Boto3.Session object with access key %s", boto_session.get_credentials().access_key)
-        return boto_session
+                boto_session = self._assume_role(sessions[-1], **kwargs)
+            keys += (key,)
+            sessions += (boto_session,)
+            boto_session._aws_account_chain = keys  # mark the object with its key ancestry
+            self._local.stack = (-1, keys, sessions)  # keep the progress should a later assumption fail
+        self._local.stack = (version, keys, sessions)
+        return sessions
 
     def revert(self):
         """Set active boto3.session.Session object to previous; return pop'd threadlocal boto3.session.Session."""
         with self._rlock:
-            if len(self._stack) > 1:
+            if len(self._stack_keys) > 1:
                 boto_session = self.boto3()
-                self._stack.pop()
-                self._reset_caches()
-                logger.debug("Reverting role to %s", self._stack[-1])
+                self._stack_kwargs.pop()
+                self._stack_keys = self._stack_keys[:-1]
+                self._stack_version += 1
+                # the previous role's memoized values are still valid
+                self._cache_access_key, self._cache_caller_identity = self._memo_stack.pop()
+                logger.debug("Reverting role to %s", self._stack_kwargs[-1])
                 return boto_session
         return None
 
@@ -182,7 +536,11 @@ class Session:
         """Set active boto3.session.Session object to role-assumed object."""
         with self._rlock:
             kwargs['sts_method'] = sts_method
-            self._stack.append((aggregated_string_hash(kwargs), kwargs,))
+            key = freeze(kwargs)
+            self._stack_keys += (key,)
+            self._stack_kwargs.append(kwargs)
+            self._stack_version += 1
+            self._memo_stack.append((self._cache_access_key, self._cache_caller_identity))
             self._reset_caches()
         if not deferred:
             self.boto3()  # init, raises on error
@@ -197,65 +555,85 @@ class Session:
                 is configured for the specified AWS service (e.g., 'sqs', 'sts'),
                 it will be added to the return client_kwargs dict.
         """
+        return dict(self._client_kwargs_view(service))
+
+    def _client_kwargs_view(self, service=None):
+        """Return read-only, memoized client_kwargs(service) mapping (no copy)."""
+        client_kwargs = self._client_kwargs_by_service.get(service)
+        if client_kwargs is None:
+            client_kwargs = self._client_kwargs_by_service.setdefault(
+                service, MappingProxyType(self._build_client_kwargs(service)))
+        return client_kwargs
+
+    def _build_client_kwargs(self, service):
+        """Compute the client kwargs for service (see client_kwargs())."""
         client_kwargs = self._client_kwargs.copy()
         kwarg_region = client_kwargs.get('region_name')
         if service and kwarg_region:
-            endpoint_url = self._service_endpoints.get(service)
-
-            # handle cross-region custom endpoints
-            if isinstance(endpoint_url, Mapping):
-                endpoint_url = endpoint_url.get(kwarg_region, None)
-
-            # if we have a custom endpoint for this region
+            # Iff the custom endpoint region and operation match, use the endpoint for that region.
+            # Otherwise, we have no choice but to fallback to the default endpoint, since boto3
+            # requires a region if endpoint_url is also given.
+            endpoint_url = self._resolved_endpoints.get((service, kwarg_region))
             if endpoint_url:
-                endpoint_region = None
-                endpoint_url_parts = endpoint_url.split('.')
-                for part in endpoint_url_parts:
-                    if part in AWS_REGIONS:
-                        endpoint_region = part
-                # Iff the custom endpoint region and operation match, use the endpoint for that region.
-                # Otherwise, we have no choice but to fallback to the default endpoint, since boto3
-                # requires a region if endpoint_url is also given.
-                if endpoint_region and endpoint_region == kwarg_region:
-                    client_kwargs['endpoint_url'] = endpoint_url
+                client_kwargs['endpoint_url'] = endpoint_url
         return client_kwargs
 
-    @cachedmethod(operator.attrgetter('_cache_access_key'), lock=operator.attrgetter('_rlock'))
-    @aws_throttling_retry()
     def access_key(self):
         """Return access key related to session."""
+        return self._memoized('_cache_access_key', self._access_key)
+
+    @aws_throttling_retry()
+    def _access_key(self):
         logger.debug("Refreshing access key cache")
         creds = self.boto3().get_credentials()  # returns None if not authenticated
         return creds.access_key if creds else None
 
-    @cachedmethod(operator.attrgetter('_cache_account_id'), lock=operator.attrgetter('_rlock'))
+    def _caller_identity(self):
+        """Return the memoized STS caller identity response of the session."""
+        return self._memoized('_cache_caller_identity', self._get_caller_identity)
+
     @aws_throttling_retry()
+    def _get_caller_identity(self):
+        # this call can be region dependent.  e.g. if calling aws from a govcloud
+        # acct, this would fail because aws doesn't understand accounts in govcloud.
+        boto3_session = self.boto3()
+        credentials = boto3_session.get_credentials()  # returns None if not authenticated
+        access_key = credentials.access_key if credentials else None
+        if access_key:
+            with _caller_identities_lock:
+                identity = _caller_identities.get(access_key)
+            if identity is not None:
+                return identity
+        logger.debug("Refreshing caller identity cache")
+        identity = self._sts_client(boto3_session).get_caller_identity()
+        if access_key:
+            with _caller_identities_lock:
+                _caller_identities[access_key] = identity
+        return identity
+
     def account_id(self):
         """Return AWS account ID related to session."""
-        logger.debug("Refreshing account id cache")
-        return self.boto3().client('sts', **self.client_kwargs(service='sts')).get_caller_identity()['Account']
+        return self._caller_identity()['Account']
 
-    @cachedmethod(operator.attrgetter('_cache_user_id'), lock=operator.attrgetter('_rlock'))
-    @aws_throttling_retry()
     def user_id(self):
         """Return AWS user ID related to session."""
-        logger.debug("Refreshing user id cache")
-        return self.boto3().client('sts', **self.client_kwargs(service='sts')).get_caller_identity()['UserId']
+        return self._caller_identity()['UserId']
 
-    @cachedmethod(operator.attrgetter('_cache_arn'), lock=operator.attrgetter('_rlock'))
     def arn(self):
         """Return the AWS Arn related to session (includes user name)."""
-        # this call can be region dependent.  e.g. if calling aws from a govcloud
-        # acct, this would fail because aws doesn't understand accounts in govcloud.
-        logger.debug("Refreshing arn cache")
-        return self.boto3().client('sts', **self.client_kwargs(service='sts')).get_caller_identity()['Arn']
+        return self._caller_identity()['Arn']
 
 
 SessionFactory = Factory(Session)
 
 
+def _session_factory_key(SessionParameters=None, AssumeRole=None, AssumeRoles=None):
+    """Return the session_factory() cache key for the call arguments."""
+    return (freeze(SessionParameters), freeze(AssumeRole), freeze(AssumeRoles))
+
+
 @interface.implementer(ISession)
-@cached(cache={}, key=aggregated_string_hash, lock=RLock())
+@cached_keyed_lock(cache=LRUCache(maxsize=1024), key=_session_factory_key)
 def session_factory(SessionParameters=None, AssumeRole=None, AssumeRoles=None):
     """Create and cache a cs.aws_account.session.Session.
 
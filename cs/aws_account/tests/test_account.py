@@ -1,4 +1,5 @@
 import os
+import time
 import unittest
 
 from zope import component
@@ -7,6 +8,7 @@ from ..testing import AWS_ACCOUNT_INTEGRATION_LAYER
 from ..interfaces import IAccount
 from ..account import Account, account_factory
 from ..session import Session
+from .test_regional_account import SessionProxy
 
 
 class IntegrationTestAWSAccountAccount(unittest.TestCase):
@@ -32,9 +34,19 @@ class IntegrationTestAWSAccountAccount(unittest.TestCase):
 
     def test_account_aliases(self):
         acct = Account(self.session)
-        self.assertEqual(len(acct._cache_aliases), 0)
+        self.assertIsNone(acct._aliases_cache[0])
         self.assertGreater(len(acct.aliases()), 0)
-        self.assertEqual(len(acct._cache_aliases), 1)
+        self.assertIs(acct._aliases_cache[0], acct.aliases())
+
+    def test_account_aliases_cache_ttl(self):
+        acct = Account(self.session, cache_ttl=1)
+        aliases = acct.aliases()
+        self.assertGreater(len(aliases), 0)
+        self.assertLess(time.monotonic(), acct._aliases_cache[1])
+        self.assertIs(aliases, acct.aliases())
+        time.sleep(1)
+        self.assertGreaterEqual(time.monotonic(), acct._aliases_cache[1])
+        self.assertIsNot(aliases, acct.aliases())
 
     def test_account_session(self):
         acct = Account(self.session)
@@ -46,6 +58,52 @@ class IntegrationTestAWSAccountAccount(unittest.TestCase):
         self.assertIs(s1, s2)
 
 
+class StubbedAccount(Account):
+    """Account listing canned aliases, counting the listings."""
+
+    def __init__(self, aliases, **kwargs):
+        super().__init__(None, **kwargs)
+        self.listed_aliases = aliases
+        self.listings = 0
+
+    def _list_account_aliases(self):
+        self.listings += 1
+        return list(self.listed_aliases)
+
+
+class TestAccountAliasesCache(unittest.TestCase):
+
+    def test_cached_for_life(self):
+        acct = StubbedAccount(['alias'])
+        acct.aliases()
+        acct.aliases()
+        self.assertEqual(1, acct.listings)
+
+    def test_cache_ttl_zero(self):
+        acct = StubbedAccount(['alias'], cache_ttl=0)
+        acct.aliases()
+        acct.aliases()
+        self.assertEqual(2, acct.listings)
+
+    def test_no_alias_cache_ttl_zero(self):
+        acct = StubbedAccount([], no_alias_cache_ttl=0)
+        acct.aliases()
+        acct.aliases()
+        self.assertEqual(2, acct.listings)
+        acct.listed_aliases = ['alias']
+        acct.aliases()
+        acct.aliases()
+        self.assertEqual(3, acct.listings)
+
+
+class TestAccountClient(unittest.TestCase):
+
+    def test_other_session_providers(self):
+        session = Session(aws_access_key_id='a', aws_secret_access_key='b', region_name='us-west-2')  # nosec B106
+        proxy = SessionProxy(session)
+        self.assertEqual('us-west-2', Account(proxy)._client('sqs').meta.region_name)
+
+
 class IntegrationTestAWSAccountAccountZCA(unittest.TestCase):
     layer = AWS_ACCOUNT_INTEGRATION_LAYER
 
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+
+from cachetools import LRUCache
+
+from ..caching import cached_keyed_lock
+
+
+class TestCachedKeyedLock(unittest.TestCase):
+
+    def test_caching(self):
+        calls = []
+
+        @cached_keyed_lock(cache={})
+        def factory(value=None):
+            calls.append(value)
+            return object()
+
+        self.assertIs(factory(value=1), factory(value=1))
+        self.assertIsNot(factory(value=1), factory(value=2))
+        self.assertEqual(calls, [1, 2])
+
+        factory.cache_clear()
+        factory(value=1)
+        self.assertEqual(calls, [1, 2, 1])
+
+    def test_bounded_cache(self):
+        calls = []
+
+        @cached_keyed_lock(cache=LRUCache(maxsize=2))
+        def factory(value=None):
+            calls.append(value)
+            return object()
+
+        first = factory(value=1)
+        factory(value=2)
+        self.assertIs(factory(value=1), first)  # 1 is now the most recently used
+        factory(value=3)  # evicts 2
+        self.assertEqual(len(factory.cache), 2)
+        self.assertIs(factory(value=1), first)
+        factory(value=2)
+        self.assertEqual(calls, [1, 2, 3, 2])
+
+    def test_single_call_per_cold_key(self):
+        calls = []
+
+        @cached_keyed_lock(cache={})
+        def factory(value=None):
+            calls.append(value)
+            time.sleep(0.05)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(factory(value=1))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(calls, [1])
+        self.assertEqual(len(results), 5)
+        for result in results:
+            self.assertIs(result, results[0])
+
+    def test_failing_calls(self):
+        calls = []
+
+        @cached_keyed_lock(cache={})
+        def factory(value=None):
+            calls.append(value)
+            raise ValueError(value)
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                factory(value=1)
+        self.assertEqual(calls, [1, 1])  # failures aren't cached
+        self.assertEqual(factory.cache, {})
+        self.assertEqual(factory.cache_locks, {})
@@ -0,0 +1,22 @@
+import unittest
+
+from boto3.session import Session as botoSession
+
+from ..clients import get_client
+
+
+class TestGetClient(unittest.TestCase):
+
+    def setUp(self):
+        self.boto3_session = botoSession(aws_access_key_id='a', aws_secret_access_key='b')  # nosec B106
+
+    def test_pooled_per_kwargs(self):
+        client = get_client(self.boto3_session, 'sts', region_name='us-east-1')
+        self.assertIs(client, get_client(self.boto3_session, 'sts', region_name='us-east-1'))
+        self.assertIsNot(client, get_client(self.boto3_session, 'sts', region_name='us-west-2'))
+        self.assertIsNot(client, get_client(self.boto3_session, 'iam', region_name='us-east-1'))
+
+    def test_pooled_per_boto3_session(self):
+        other = botoSession(aws_access_key_id='a', aws_secret_access_key='b')  # nosec B106
+        self.assertIsNot(get_client(self.boto3_session, 'sts', region_name='us-east-1'),
+                         get_client(other, 'sts', region_name='us-east-1'))
@@ -1,12 +1,16 @@
+import asyncio
 from datetime import timedelta
 import os
+import threading
+import time
 import unittest
 
+from botocore.stub import Stubber
 from cs.ratelimit import RateLimitProperties, RateLimitExceeded
-from zope import component
+from zope import component, interface
 
 from ..account import Account
-from ..interfaces import IRegionalAccount
+from ..interfaces import IRegionalAccount, IRegionalAccounts
 from ..regional_account import RegionalAccount
 from ..session import Session
 from ..testing import AWS_ACCOUNT_INTEGRATION_LAYER
@@ -30,6 +34,11 @@ class IntegrationTestAWSAccountRegionalAccount(unittest.TestCase):
     def test_account(self):
         self.assertIs(self.ra.account(), self.account)
 
+    def test_get_client_cached(self):
+        client = self.ra._get_client('sts')
+        self.assertIs(client, self.ra._get_client('sts'))
+        self.assertIsNot(client, self.ra._get_client('sts', endpoint_url='https://sts.us-east-1.amazonaws.com'))
+
     def test_call_client(self):
         self.ra.call_client('sts', 'get_caller_identity')
         with self.assertRaises(RateLimitExceeded):
@@ -71,3 +80,177 @@ class IntegrationTestAWSAccountRegionalAccountZCA(unittest.TestCase):
                 component.createObject(u"cs.aws_account.cached_regional_account",
                                        Account={'SessionParameters': self.session_kwargs})
             )
+
+
+class FakeAccount:
+    """Stand-in for a cs.aws_account.Account that makes no AWS calls."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def session(self):
+        return self._session
+
+    def alias(self):
+        return 'alias'
+
+    def account_id(self):
+        return '123456789012'
+
+
+class SessionProxy:
+    """ISession provider other than cs.aws_account.Session, delegating to one."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def boto3(self):
+        return self._session.boto3()
+
+    def client_kwargs(self, service=None):
+        return self._session.client_kwargs(service)
+
+
+class BlockingClient:
+    """Stand-in boto3 client whose list_users() blocks until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def list_users(self, **kwargs):
+        self.calls.append(kwargs)
+        self.release.wait(5)
+        return {'Users': []}
+
+
+class FakeClientRegionalAccount(RegionalAccount):
+
+    client = None
+
+    def _get_client(self, service, **kwargs):
+        return self.client
+
+
+class SmallCacheRegionalAccount(RegionalAccount):
+
+    response_cache_maxsize = 1
+
+
+class TestRegionalAccountStubbed(unittest.TestCase):
+
+    def setUp(self):
+        self.session = Session(aws_access_key_id='a', aws_secret_access_key='b', region_name='us-east-1')  # nosec B106
+        self.account = FakeAccount(self.session)
+
+    def regional_account(self, factory=RegionalAccount, ratelimit=None, **kwargs):
+        return factory(ratelimit or RateLimitProperties(), self.account, region_name='us-east-1', **kwargs)
+
+    def stub(self, ra, service):
+        stubber = Stubber(ra._get_client(service))  # same pooled client for the thread
+        stubber.activate()
+        self.addCleanup(stubber.deactivate)
+        return stubber
+
+    def test_response_cache_hit(self):
+        ra = self.regional_account(response_cache_ttl={'iam:list_users': 60})
+        stubber = self.stub(ra, 'iam')
+        stubber.add_response('list_users', {'Users': []}, {'PathPrefix': '/a/'})
+        response = ra.call_client('iam', 'list_users', PathPrefix='/a/')
+        self.assertIs(response, ra.call_client('iam', 'list_users', PathPrefix='/a/'))
+        stubber.assert_no_pending_responses()
+
+    def test_response_cache_expiry(self):
+        ra = self.regional_account(response_cache_ttl={'iam:list_users': 0.05})
+        stubber = self.stub(ra, 'iam')
+        stubber.add_response('list_users', {'Users': []})
+        stubber.add_response('list_users', {'Users': []})
+        response = ra.call_client('iam', 'list_users')
+        time.sleep(0.1)
+        self.assertIsNot(response, ra.call_client('iam', 'list_users'))
+        stubber.assert_no_pending_responses()
+
+    def test_response_cache_eviction(self):
+        ra = self.regional_account(SmallCacheRegionalAccount, response_cache_ttl={'iam:list_users': 60})
+        stubber = self.stub(ra, 'iam')
+        for path_prefix in ('/a/', '/b/', '/a/'):
+            stubber.add_response('list_users', {'Users': []}, {'PathPrefix': path_prefix})
+        for path_prefix in ('/a/', '/b/', '/a/'):  # '/b/' evicts '/a/'
+            ra.call_client('iam', 'list_users', PathPrefix=path_prefix)
+        stubber.assert_no_pending_responses()
+
+    def test_response_cache_other_methods(self):
+        ra = self.regional_account(response_cache_ttl={'iam:list_users': 60})
+        stubber = self.stub(ra, 'iam')
+        stubber.add_response('list_roles', {'Roles': []})
+        stubber.add_response('list_roles', {'Roles': []})
+        ra.call_client('iam', 'list_roles')
+        ra.call_client('iam', 'list_roles')
+        stubber.assert_no_pending_responses()
+
+    def concurrent_calls(self, ra, count, **kwargs):
+        ra.client = client = BlockingClient()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(ra.call_client('iam', 'list_users', **kwargs)))
+                   for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while not client.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)  # let the other callers reach the client, or the in-flight call
+        client.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(count, len(results))
+        return client, results
+
+    def test_not_coalesced_by_default(self):
+        ra = self.regional_account(FakeClientRegionalAccount)
+        client, results = self.concurrent_calls(ra, 2)
+        self.assertEqual(2, len(client.calls))
+        self.assertIsNot(results[0], results[1])
+
+    def test_coalesced(self):
+        ra = self.regional_account(FakeClientRegionalAccount, coalesce_prefixes=('list_',))
+        client, results = self.concurrent_calls(ra, 2)
+        self.assertEqual(1, len(client.calls))
+        self.assertIs(results[0], results[1])
+        self.assertEqual({}, ra._inflight)
+
+    def test_coalesced_unhashable_arguments(self):
+        ra = self.regional_account(FakeClientRegionalAccount, coalesce_prefixes=('list_',))
+        client, _ = self.concurrent_calls(ra, 2, Marker=bytearray(b'unhashable'))
+        self.assertEqual(2, len(client.calls))
+
+    def test_acall_client(self):
+        ra = self.regional_account(FakeClientRegionalAccount)
+        ra.client = client = BlockingClient()
+        client.release.set()
+
+        async def calls():
+            return await asyncio.gather(ra.acall_client('iam', 'list_users', PathPrefix='/a/'),
+                                        ra.acall_client('iam', 'list_users', PathPrefix='/b/'))
+        self.assertEqual([{'Users': []}, {'Users': []}], asyncio.run(calls()))
+        self.assertCountEqual([{'PathPrefix': '/a/'}, {'PathPrefix': '/b/'}], client.calls)
+
+    def test_paginator_rate_limited(self):
+        ratelimit = RateLimitProperties(max_count=1, interval=timedelta(seconds=10), block=False)
+        ra = self.regional_account(ratelimit=ratelimit)
+        stubber = self.stub(ra, 'ec2')
+        stubber.add_response('describe_instances', {'Reservations': [], 'NextToken': 'next'})
+        pages = ra.get_paginator('ec2', 'describe_instances').paginate()
+        with self.assertRaises(RateLimitExceeded):
+            for _ in pages:
+                pass
+        stubber.assert_no_pending_responses()
+
+    def test_also_provides(self):
+        ra = self.regional_account()
+        interface.alsoProvides(ra, IRegionalAccounts)  # any interface will do
+        self.assertTrue(IRegionalAccounts.providedBy(ra))
+        self.assertTrue(IRegionalAccount.providedBy(ra))
+
+    def test_other_session_providers(self):
+        ra = RegionalAccount(RateLimitProperties(), FakeAccount(SessionProxy(self.session)), region_name='us-east-1')
+        self.assertEqual('us-east-1', ra._get_client('sqs').meta.region_name)
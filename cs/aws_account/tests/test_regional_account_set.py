@@ -1,10 +1,10 @@
 import os
 import unittest
 
-from zope import component
+from zope import component, interface
 
 from ..account import Account
-from ..interfaces import IRegionalAccountSet
+from ..interfaces import IRegionalAccounts, IRegionalAccountSet
 from ..regional_account import RegionalAccount
 from ..regional_account_set import RegionalAccountSet
 from ..regional_accounts import RegionalAccounts, regional_accounts_factory
@@ -133,3 +133,12 @@ class IntegrationTestAWSAccountRegionalAccountSetZCA(unittest.TestCase):
                 component.createObject(u"cs.aws_account.regional_account_set_from_config",
                                        *self.args)
             )
+
+
+class TestRegionalAccountSet(unittest.TestCase):
+
+    def test_also_provides(self):
+        ras = RegionalAccountSet()
+        interface.alsoProvides(ras, IRegionalAccounts)  # any interface will do
+        self.assertTrue(IRegionalAccounts.providedBy(ras))
+        self.assertTrue(IRegionalAccountSet.providedBy(ras))
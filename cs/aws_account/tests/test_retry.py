@@ -0,0 +1,46 @@
+from unittest import mock
+import unittest
+
+from ..retry import aws_throttling_retry
+
+
+class TestAWSThrottlingRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    def throttled(self, failures):
+        @aws_throttling_retry(max_retries=3, base=0.5, growth_factor=0.5)
+        def call():
+            self.calls += 1
+            if self.calls <= failures:
+                raise Exception('An error occurred (Throttling): Rate exceeded')
+            return 'ok'
+        return call
+
+    @mock.patch('cs.aws_account.retry.time.sleep')
+    @mock.patch('cs.aws_account.retry.random.uniform', side_effect=lambda a, b: b)
+    def test_jittered_backoff_bounds(self, uniform, sleep):
+        self.assertEqual('ok', self.throttled(2)())
+        self.assertEqual([mock.call(0.5, 1.0), mock.call(0.5, 1.5)], uniform.call_args_list)
+        self.assertEqual([mock.call(1.0), mock.call(1.5)], sleep.call_args_list)
+
+    @mock.patch('cs.aws_account.retry.time.sleep')
+    def test_exhausted(self, sleep):
+        with self.assertRaises(Exception):
+            self.throttled(3)()
+        self.assertEqual(3, self.calls)
+        self.assertEqual(2, sleep.call_count)
+        for (seconds,), _ in sleep.call_args_list:
+            self.assertTrue(0.5 <= seconds <= 1.5)
+
+    @mock.patch('cs.aws_account.retry.time.sleep')
+    def test_other_errors_not_retried(self, sleep):
+        @aws_throttling_retry()
+        def call():
+            self.calls += 1
+            raise ValueError('boom')
+        with self.assertRaises(ValueError):
+            call()
+        self.assertEqual(1, self.calls)
+        sleep.assert_not_called()
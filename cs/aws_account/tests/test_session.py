@@ -1,29 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import gc
 import os
+import tempfile
 import threading
 import time
 import unittest
+import weakref
 
-from zope import component
+import botocore.session
+from zope import component, interface
 from zope.interface.verify import verifyObject
 
 from ..interfaces import ISession
 from ..testing import AWS_ACCOUNT_INTEGRATION_LAYER
 from cs.aws_account.b3 import IBoto3Session
-from cs.aws_account.session import Session, session_factory
+from cs.aws_account.session import Session, session_factory, _cached_credentials
+
+
+class FakeSTS:
+    """Stand-in for a boto3 STS client, recording its calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def assume_role(self, **kwargs):
+        self.calls.append(('assume_role', kwargs))
+        n = len(self.calls)
+        role_name = kwargs['RoleArn'].rsplit('/', 1)[-1]
+        return {
+            'Credentials': {
+                'AccessKeyId': f'ASIA{n}{id(self)}',
+                'SecretAccessKey': 'secret',
+                'SessionToken': 'token',
+                'Expiration': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            'AssumedRoleUser': {
+                'AssumedRoleId': f'AROA{n}:{kwargs["RoleSessionName"]}',
+                'Arn': f'arn:aws:sts::123456789012:assumed-role/{role_name}/{kwargs["RoleSessionName"]}',
+            },
+        }
+
+    def get_caller_identity(self):
+        self.calls.append(('get_caller_identity', {}))
+        return {'UserId': 'AIDATEST', 'Account': '123456789012', 'Arn': 'arn:aws:iam::123456789012:user/test'}
+
+
+class StubbedSession(Session):
+    """Session whose STS calls are served by a FakeSTS."""
+
+    def __init__(self, sts, **kwargs):
+        self.sts = sts
+        super().__init__(**kwargs)
+
+    def _sts_client(self, boto3_session):
+        return self.sts
+
+
+ROLE = {'RoleArn': 'arn:aws:iam::123456789012:role/test', 'RoleSessionName': 'testing'}
 
 
 class IntegrationTestAWSAccountSession(unittest.TestCase):
 
     level = 2
 
+    # class attributes, since zope.testrunner doesn't run setUpClass()
+    aws_access_key_id = os.environ.get('AWS_ACCESS_KEY_ID')
+    aws_secret_access_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    aws_assume_role = os.environ.get('AWS_ASSUME_ROLE')
+
     def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)  # threads are only started on submit()
+        self.addCleanup(self.executor.shutdown)
         self.session_kwargs = {
-            'aws_access_key_id':     os.environ.get('AWS_ACCESS_KEY_ID'),
-            'aws_secret_access_key': os.environ.get('AWS_SECRET_ACCESS_KEY'),
+            'aws_access_key_id':     self.aws_access_key_id,
+            'aws_secret_access_key': self.aws_secret_access_key,
         }
         self.assume_role_kwargs = {
             'sts_method': 'assume_role',
-            'RoleArn': os.environ.get('AWS_ASSUME_ROLE'),
+            'RoleArn': self.aws_assume_role,
             'RoleSessionName': 'testing_assume_role_for_cs_aws_account_package',
         }
 
@@ -37,22 +93,18 @@ class IntegrationTestAWSAccountSession(unittest.TestCase):
         self.assertIs(b3, s.boto3())
 
     def test_get_credentials(self):
-        lock = threading.Lock()
-        b3_sessions = []
         s = Session(**self.session_kwargs)
         s.assume_role(**self.assume_role_kwargs)
 
-        def add_session(s, b3_sessions):
-            with lock:
-                b3_sessions.append(s.boto3())
-
-        t1 = threading.Thread(target=add_session, args=[s, b3_sessions])
-        t2 = threading.Thread(target=add_session, args=[s, b3_sessions])
-        t1.start()
-        t2.start()
-        t1.join()
-        t2.join()
+        # distinct threads are required, a pooled worker could run both calls
+        b3_sessions = []
+        threads = [threading.Thread(target=lambda: b3_sessions.append(s.boto3())) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
         b3_sessions.append(s.boto3())
+        self.assertEqual(3, len({id(b3) for b3 in b3_sessions}))
         self.assertIs(b3_sessions[0]._session._credentials,
                       b3_sessions[1]._session._credentials)
         self.assertIs(b3_sessions[1]._session._credentials,
@@ -66,65 +118,68 @@ class IntegrationTestAWSAccountSession(unittest.TestCase):
     def test_caches(self):
         s = Session(**self.session_kwargs)
 
-        def get_cache_lengths():
+        def get_cached():
+            now = time.monotonic()
             return (
-                len(s._cache_access_key),
-                len(s._cache_account_id),
-                len(s._cache_user_id),
-                len(s._cache_arn),
+                int(now < s._cache_access_key[1]),
+                int(now < s._cache_caller_identity[1]),
             )
 
-        self.assertEqual((0, 0, 0, 0), get_cache_lengths())
+        self.assertEqual((0, 0), get_cached())
         s.access_key()
         s.account_id()
         s.user_id()
         s.arn()
-        self.assertEqual((1, 1, 1, 1), get_cache_lengths())
+        self.assertEqual((1, 1), get_cached())
 
         s.access_key()
         s.account_id()
         s.user_id()
         s.arn()
-        self.assertEqual((1, 1, 1, 1), get_cache_lengths())
+        self.assertEqual((1, 1), get_cached())
+
+        s.assume_role(**self.assume_role_kwargs)
+        self.assertEqual((0, 0), get_cached())
+        s.revert()
+        self.assertEqual((1, 1), get_cached())
 
     def test_cache_ttl(self):
-        s = Session(cache_ttl=1, **self.session_kwargs)
+        clock = [0.0]
+        s = Session(cache_ttl=1, time_source=lambda: clock[0], **self.session_kwargs)
 
-        def get_cache_lengths():
+        def get_cached():
+            now = clock[0]
             return (
-                len(s._cache_access_key),
-                len(s._cache_account_id),
-                len(s._cache_user_id),
-                len(s._cache_arn),
+                int(now < s._cache_access_key[1]),
+                int(now < s._cache_caller_identity[1]),
             )
 
-        self.assertEqual((0, 0, 0, 0), get_cache_lengths())
+        self.assertEqual((0, 0), get_cached())
 
         s.access_key()
         s.account_id()
         s.user_id()
         s.arn()
-        self.assertEqual((1, 1, 1, 1), get_cache_lengths())
+        self.assertEqual((1, 1), get_cached())
 
-        time.sleep(1)
-        self.assertEqual((0, 0, 0, 0), get_cache_lengths())
+        clock[0] += 1
+        self.assertEqual((0, 0), get_cached())
 
         s.access_key()
         s.account_id()
         s.user_id()
         s.arn()
-        self.assertEqual((1, 1, 1, 1), get_cache_lengths())
+        self.assertEqual((1, 1), get_cached())
 
     def test_threadlocal_boto3(self):
         s = Session(**self.session_kwargs)
-        lock = threading.Lock()
+        # distinct threads are required, a pooled worker could run both calls
         d = []
         errors = []
 
         def tl_session():
             try:
-                with lock:
-                    d.append(s.boto3())
+                d.append(s.boto3())
             except Exception as e:
                 errors.append(e)
                 return
@@ -178,12 +233,20 @@ class IntegrationTestAWSAccountSession(unittest.TestCase):
         s1.client('sts').get_caller_identity()['UserId']
         s2.client('sts').get_caller_identity()['UserId']
 
+    def test_short_role_credentials_reused(self):
+        s = Session(**self.session_kwargs)
+        s.assume_role(DurationSeconds=900, **self.assume_role_kwargs)
+        credentials = s.boto3().get_credentials()
+        ak = credentials.access_key
+        s.boto3().client('sts').get_caller_identity()
+        s.boto3().client('sts').get_caller_identity()
+        self.assertEqual(ak, credentials.access_key)
+        self.assertFalse(credentials.refresh_needed())
+
     def test_threadlocal_assume_role(self):
         s = Session(**self.session_kwargs)
         ak1 = s.access_key()
-        t1 = threading.Thread(target=s.assume_role, kwargs=self.assume_role_kwargs)
-        t1.start()
-        t1.join()
+        self.executor.submit(s.assume_role, **self.assume_role_kwargs).result()
         self.assertNotEqual(ak1, s.access_key())
 
     def test_threadlocal_revert(self):
@@ -191,9 +254,7 @@ class IntegrationTestAWSAccountSession(unittest.TestCase):
         ak1 = s.access_key()
         s.assume_role(**self.assume_role_kwargs)
         ak2 = s.access_key()
-        t1 = threading.Thread(target=s.revert)
-        t1.start()
-        t1.join()
+        self.executor.submit(s.revert).result()
         self.assertEqual(ak1, s.access_key())
         self.assertNotEqual(ak2, s.access_key())
 
@@ -282,3 +343,169 @@ class TestSessionClientKwargs(unittest.TestCase):
         self.session_kwargs.pop('region_name')
         s = Session(**self.session_kwargs)
         self.assertDictEqual(s.client_kwargs(service='sts'), {})
+
+
+class TestSessionDataLoader(unittest.TestCase):
+
+    def test_shared_among_threads(self):
+        s = Session(aws_access_key_id='a', aws_secret_access_key='b')  # nosec B106
+        d = [s.boto3()]
+        t = threading.Thread(target=lambda: d.append(s.boto3()))
+        t.start()
+        t.join()
+        self.assertIsNot(d[0], d[1])
+        loader = d[0]._session.get_component('data_loader')
+        self.assertIs(loader, d[1]._session.get_component('data_loader'))
+        self.assertEqual(len(loader.search_paths), len(set(loader.search_paths)))
+
+
+class TestSessionSharedCredentials(unittest.TestCase):
+
+    def sessions(self, *access_keys, **kwargs):
+        sts = FakeSTS()
+        sessions = [StubbedSession(sts, aws_access_key_id=access_key, aws_secret_access_key='b', **kwargs)  # nosec B106
+                    for access_key in access_keys]
+        for s in sessions:
+            s.assume_role(**ROLE)
+        return sts, sessions
+
+    def test_shared_by_default(self):
+        sts, (s1, s2) = self.sessions('shared', 'shared')
+        self.assertEqual(1, len(sts.calls))
+        self.assertIs(s1.boto3()._session._credentials, s2.boto3()._session._credentials)
+
+    def test_not_shared(self):
+        sts, (s1, s2) = self.sessions('not-shared', 'not-shared', ShareCredentials=False)
+        self.assertEqual(2, len(sts.calls))
+        self.assertNotEqual(s1.access_key(), s2.access_key())
+
+    def test_not_shared_among_source_identities(self):
+        sts, (s1, s2) = self.sessions('source-1', 'source-2')
+        self.assertEqual(2, len(sts.calls))
+        self.assertIsNot(s1.boto3()._session._credentials, s2.boto3()._session._credentials)
+
+
+class TestSessionCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+
+    def session(self, sts, access_key='disk-cache'):
+        s = StubbedSession(sts, aws_access_key_id=access_key, aws_secret_access_key='b',  # nosec B106
+                           CredentialCacheDir=self.cache_dir, ShareCredentials=False)
+        s.assume_role(**ROLE)
+        return s
+
+    def test_reused_by_other_sessions(self):
+        sts1, sts2 = FakeSTS(), FakeSTS()
+        access_key = self.session(sts1).access_key()
+        self.assertEqual(1, len(sts1.calls))
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+        self.assertEqual(access_key, self.session(sts2).access_key())
+        self.assertEqual([], sts2.calls)
+
+    def test_not_shared_among_source_identities(self):
+        sts1, sts2 = FakeSTS(), FakeSTS()
+        access_key = self.session(sts1).access_key()
+        self.assertNotEqual(access_key, self.session(sts2, access_key='disk-cache-other').access_key())
+        self.assertEqual(1, len(sts2.calls))
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
+
+    def test_naive_expiry_time(self):
+        credential_cache = {'key': {'expiry_time': '2100-01-01T00:00:00'}}
+        self.assertIsNone(_cached_credentials(credential_cache, 'key'))
+
+
+class TestSessionCallerIdentities(unittest.TestCase):
+
+    def test_shared_among_sessions(self):
+        sts1, sts2 = FakeSTS(), FakeSTS()
+        s1 = StubbedSession(sts1, aws_access_key_id='identity', aws_secret_access_key='b')  # nosec B106
+        s2 = StubbedSession(sts2, aws_access_key_id='identity', aws_secret_access_key='b')  # nosec B106
+        self.assertEqual('123456789012', s1.account_id())
+        self.assertEqual(1, len(sts1.calls))
+        self.assertEqual('123456789012', s2.account_id())
+        self.assertEqual('arn:aws:iam::123456789012:user/test', s2.arn())
+        self.assertEqual([], sts2.calls)
+
+    def test_seeded_by_role_assumption(self):
+        sts = FakeSTS()
+        s = StubbedSession(sts, aws_access_key_id='identity-seed', aws_secret_access_key='b')  # nosec B106
+        s.assume_role(**ROLE)
+        self.assertEqual('123456789012', s.account_id())
+        self.assertEqual('AROA1:testing', s.user_id())
+        self.assertEqual('arn:aws:sts::123456789012:assumed-role/test/testing', s.arn())
+        self.assertEqual(['assume_role'], [method for method, _ in sts.calls])
+
+
+class TestSessionThreadlocal(unittest.TestCase):
+
+    def test_released_with_session(self):
+        s = Session(aws_access_key_id='a', aws_secret_access_key='b')  # nosec B106
+        b3 = weakref.ref(s.boto3())
+        del s
+        gc.collect()
+        self.assertIsNone(b3())
+
+
+class IMarker(interface.Interface):
+    """Marker interface for the tests."""
+
+
+class TestSessionInterfaces(unittest.TestCase):
+
+    def test_also_provides(self):
+        s = Session(aws_access_key_id='a', aws_secret_access_key='b')  # nosec B106
+        interface.alsoProvides(s, IMarker)
+        self.assertTrue(IMarker.providedBy(s))
+        self.assertTrue(ISession.providedBy(s))
+        other = Session(aws_access_key_id='a', aws_secret_access_key='b')  # nosec B106
+        self.assertFalse(IMarker.providedBy(other))
+
+
+class TestSessionTimeSource(unittest.TestCase):
+
+    def test_cache_ttl(self):
+        clock = [0.0]
+        s = Session(aws_access_key_id='a', aws_secret_access_key='b', cache_ttl=1, time_source=lambda: clock[0])  # nosec B106
+        self.assertEqual('a', s.access_key())
+        self.assertEqual(('a', 1.0), s._cache_access_key)
+        clock[0] += 1
+        self.assertEqual('a', s.access_key())
+        self.assertEqual(('a', 2.0), s._cache_access_key)
+
+    def test_cache_ttl_zero(self):
+        s = Session(aws_access_key_id='a', aws_secret_access_key='b', cache_ttl=0, time_source=lambda: 0.0)  # nosec B106
+        self.assertEqual('a', s.access_key())
+        self.assertEqual(('a', 0.0), s._cache_access_key)  # expired as soon as memoized
+
+
+class TestSessionConcurrency(unittest.TestCase):
+
+    def test_revert_while_resolving_base_credentials(self):
+        sts = FakeSTS()
+        s = StubbedSession(sts, aws_access_key_id='concurrency', aws_secret_access_key='b')  # nosec B106
+        s.assume_role(deferred=True, **ROLE)
+        started, release = threading.Event(), threading.Event()
+        get_credentials = botocore.session.Session.get_credentials
+
+        def slow_get_credentials(botocore_session):
+            started.set()
+            release.wait(5)
+            return get_credentials(botocore_session)
+
+        with mock.patch.object(botocore.session.Session, 'get_credentials', slow_get_credentials):
+            leader = threading.Thread(target=s.boto3, daemon=True)
+            leader.start()
+            self.assertTrue(started.wait(5))
+            reverter = threading.Thread(target=s.revert, daemon=True)  # waits on the leader holding the lock
+            reverter.start()
+            time.sleep(0.1)
+            release.set()
+            leader.join(5)
+            reverter.join(5)
+        self.assertFalse(leader.is_alive())
+        self.assertFalse(reverter.is_alive())
+        self.assertEqual(1, len(s._stack_keys))